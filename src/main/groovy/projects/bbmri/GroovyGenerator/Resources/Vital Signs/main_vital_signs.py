@@ -0,0 +1,13 @@
+import generator
+
+# Fields to replace in template: laboratory method code of CXX (its value is ##Method##Value), simplifier page, LOINC
+# code and UCUM unit
+templates = [
+    generator.ScriptTemplate("template_VitalSign", "observationBodyHeight", "Observation", "LABOR_MAPPING",
+                             {"Method": "BodyHeight", "Page": "bodyheight", "Loinc": "8302-2", "Unit": "cm"}),
+    generator.ScriptTemplate("template_VitalSign", "observationBodyWeight", "Observation", "LABOR_MAPPING",
+                             {"Method": "BodyWeight", "Page": "bodyweight", "Loinc": "29463-7", "Unit": "kg"}),
+]
+
+# Both scripts take the id of the laboratory finding, exported once as a finding has only one method
+shared_resource_ids = ["Observation/{}"]
@@ -0,0 +1,5 @@
+import generator
+
+templates = [
+    generator.ScriptTemplate("template_Patient", "patient", "Patient", "PATIENT_MASTER"),
+]
@@ -0,0 +1,5 @@
+import generator
+
+templates = [
+    generator.ScriptTemplate("template_Specimen", "specimen", "Specimen", "SAMPLE"),
+]
@@ -0,0 +1,2 @@
+# Loaded by generator.py: the leaf folders below generate the groovy scripts of the project from templates, in this order
+leaves = ["Patient", "Specimen", "Condition", "Observation"]
@@ -0,0 +1,5 @@
+import generator
+
+templates = [
+    generator.ScriptTemplate("template_Systemtherapie", "systemtherapie", "MedicationStatement", "SYSTEM_THERAPY"),
+]
@@ -0,0 +1,5 @@
+import generator
+
+templates = [
+    generator.ScriptTemplate("template_Vitalstatus", "vitalstatus", "Observation", "PATIENT_MASTER"),
+]
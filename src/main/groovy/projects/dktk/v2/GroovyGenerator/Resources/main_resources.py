@@ -0,0 +1,23 @@
+# Loaded by generator.py: the leaf folders below generate the groovy scripts of the project from templates, in this order
+leaves = [
+    "Organisation",
+    "Patient",
+    "Fall",
+    "Specimen",
+    "Condition",
+    "Strahlentherapie",
+    "Systemtherapie",
+    "Operation",
+    "Tnmp",
+    "Fernmetastasen",
+    "ResidualstatusGlobal",
+    "ResidualstatusLokal",
+    "Histologie",
+    "Grading",
+    "Vitalstatus",
+    "TumorstatusGesamt",
+    "TumorstatusLokal",
+    "TumorstatusLymph",
+    "TumorstatusMetas",
+    "Verlauf",
+]
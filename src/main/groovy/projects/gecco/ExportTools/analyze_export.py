@@ -0,0 +1,146 @@
+import argparse
+import hashlib
+import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from bundle_stream import is_delete, iter_entries, list_bundle_files, resource_id, template_key
+
+# Number of duplicated ids listed in the report
+NB_DUPLICATES_SHOWN = 20
+
+
+def analyze_bundle(path):
+    # Statistics of a single bundle file, computed while streaming its entries
+    resources_per_type = Counter()
+    resources_per_template = Counter()
+    bytes_per_type = Counter()
+    deletes_per_type = Counter()
+    ids = []
+    nb_entries = 0
+    for entry in iter_entries(path):
+        nb_entries += 1
+        res_id = resource_id(entry)
+        if res_id is None:
+            continue
+        res_type = res_id.split("/")[0]
+        # Deletions are no exported resources, they are counted on their own
+        if is_delete(entry):
+            deletes_per_type[res_type] += 1
+            continue
+        resources_per_type[res_type] += 1
+        bytes_per_type[res_type] += len(json.dumps(entry["resource"], separators=(",", ":")).encode("utf-8"))
+        resources_per_template[template_key(res_id)] += 1
+        ids.append(res_id)
+    return {
+        "file": path,
+        "bytes": os.path.getsize(path),
+        "entries": nb_entries,
+        "resourcesPerType": resources_per_type,
+        "resourcesPerTemplate": resources_per_template,
+        "bytesPerType": bytes_per_type,
+        "deletesPerType": deletes_per_type,
+        "ids": ids,
+    }
+
+
+def distribution(values):
+    # Nearest rank percentiles of a list of numbers
+    if not values:
+        return {}
+    values = sorted(values)
+
+    def percentile(p):
+        return values[min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))]
+
+    return {
+        "min": values[0],
+        "p50": percentile(50),
+        "p90": percentile(90),
+        "p99": percentile(99),
+        "max": values[-1],
+        "mean": round(sum(values) / len(values), 1),
+    }
+
+
+def analyze_export(export_folder, workers=None):
+    bundle_files = list_bundle_files(export_folder)
+
+    resources_per_type = Counter()
+    resources_per_template = Counter()
+    bytes_per_type = Counter()
+    deletes_per_type = Counter()
+    bundle_bytes = []
+    bundle_entries = []
+
+    # Only a digest per id is kept, so memory stays small for millions of resources
+    seen_ids = set()
+    duplicates = Counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for stats in executor.map(analyze_bundle, bundle_files, chunksize=16):
+            resources_per_type.update(stats["resourcesPerType"])
+            resources_per_template.update(stats["resourcesPerTemplate"])
+            bytes_per_type.update(stats["bytesPerType"])
+            deletes_per_type.update(stats["deletesPerType"])
+            bundle_bytes.append(stats["bytes"])
+            bundle_entries.append(stats["entries"])
+            for res_id in stats["ids"]:
+                digest = hashlib.blake2b(res_id.encode("utf-8"), digest_size=8).digest()
+                if digest in seen_ids:
+                    duplicates[res_id] += 1
+                else:
+                    seen_ids.add(digest)
+
+    return {
+        "exportFolder": export_folder,
+        "bundles": len(bundle_files),
+        "resources": sum(resources_per_type.values()),
+        "uniqueResources": len(seen_ids),
+        "resourcesPerType": dict(resources_per_type.most_common()),
+        "resourcesPerTemplate": dict(resources_per_template.most_common()),
+        "averageBytesPerResource": {res_type: round(bytes_per_type[res_type] / count)
+                                    for res_type, count in resources_per_type.items() if bytes_per_type[res_type]},
+        "deletes": sum(deletes_per_type.values()),
+        "deletesPerType": dict(deletes_per_type.most_common()),
+        "bundleBytes": distribution(bundle_bytes),
+        "bundleEntries": distribution(bundle_entries),
+        "duplicatedIds": len(duplicates),
+        "duplicates": {res_id: count + 1 for res_id, count in duplicates.most_common(NB_DUPLICATES_SHOWN)},
+    }
+
+
+def print_report(report):
+    print(f"Bundles: {report['bundles']}")
+    print(f"Resources: {report['resources']} ({report['uniqueResources']} unique ids)")
+    print(f"Deletes: {report['deletes']} {report['deletesPerType']}")
+    print(f"Bundle bytes: {report['bundleBytes']}")
+    print(f"Bundle entries: {report['bundleEntries']}")
+
+    print("\nResources per type:")
+    for res_type, count in report["resourcesPerType"].items():
+        print(f"  {res_type:<30} {count:>10}  ~{report['averageBytesPerResource'].get(res_type, 0)} bytes/resource")
+
+    print("\nResources per template:")
+    for template, count in report["resourcesPerTemplate"].items():
+        print(f"  {template:<70} {count:>10}")
+
+    print(f"\nDuplicated ids: {report['duplicatedIds']}")
+    for res_id, count in report["duplicates"].items():
+        print(f"  {res_id} ({count} times)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze the FHIR bundles of a file system export (exportFolder).")
+    parser.add_argument("export_folder", help="exportFolder of the ProjectConfig.json")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: number of cpus)")
+    parser.add_argument("--json", dest="json_file", help="write the report additionally to this json file")
+    args = parser.parse_args()
+
+    export_report = analyze_export(args.export_folder, args.workers)
+    print_report(export_report)
+
+    if args.json_file:
+        with open(args.json_file, "w") as f:
+            json.dump(export_report, f, indent=2)
@@ -0,0 +1,142 @@
+import json
+import os
+import re
+from datetime import datetime
+
+# Number of characters read from a bundle file at once. Grows while a single value does not fit.
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"[ \t\n\r]*")
+
+# Export time in a bundle file name: a date with optional time (20210624, 2021-06-24T10-11-12.123, ...) or epoch millis
+_file_name_time = re.compile(r"(?<!\d)(\d{4})-?(\d{2})-?(\d{2})(?:[T_ -]?(\d{2})[-:.]?(\d{2})[-:.]?(\d{2})"
+                             r"(?:[.,](\d{1,6}))?)?(?!\d)|(?<!\d)(1\d{12})(?!\d)")
+
+# CentraXX ids (and iteration numbers) at the end of a resource id: -123, -2-123, or digits right after the name
+_trailing_ids = re.compile(r"(?:-\d+)+$|(?<=[A-Za-z_])\d+$")
+
+
+class _BundleReader:
+    # Minimal incremental reader over the top level of a FHIR bundle. Only one value (e.g. one entry) is held
+    # in memory at a time, so bundles exported with a large pageSize do not have to be loaded completely.
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size=CHUNK_SIZE):
+        chunk = self.f.read(size)
+        if not chunk:
+            self.eof = True
+            return
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self):
+        while True:
+            self.pos = _whitespace.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self.fill()
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos} in {self.f.name}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        size = CHUNK_SIZE
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number at the end of the buffer might continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill(size)
+            size *= 2
+
+
+def iter_entries(path):
+    # Yields the entries of a bundle file one by one, skipping every other top level element
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _BundleReader(f)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            key = reader.value()
+            reader.expect(":")
+            if key == "entry":
+                reader.expect("[")
+                if reader.peek() == "]":
+                    reader.pos += 1
+                else:
+                    while True:
+                        yield reader.value()
+                        if reader.peek() == "]":
+                            reader.pos += 1
+                            break
+                        reader.expect(",")
+            else:
+                reader.value()
+            if reader.peek() == "}":
+                return
+            reader.expect(",")
+
+
+def export_time(bundle_file):
+    # Export time of a bundle as a posix timestamp: from its file name, or the modification time of the file
+    for match in _file_name_time.finditer(os.path.basename(bundle_file)):
+        year, month, day, hour, minute, second, fraction, millis = match.groups()
+        if millis:
+            return int(millis) / 1000
+        try:
+            return datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0),
+                            int((fraction or "0").ljust(6, "0"))).timestamp()
+        except ValueError:
+            continue
+    return os.path.getmtime(bundle_file)
+
+
+def list_bundle_files(export_folder):
+    # All json bundles below the export folder in export order. The path alone does not give the order: bundles of
+    # several exports are in different folders, so they are sorted by export time (file name or modification time).
+    bundle_files = []
+    for root, _, file_names in os.walk(export_folder):
+        for file_name in file_names:
+            if file_name.endswith(".json"):
+                bundle_files.append(os.path.join(root, file_name))
+    return sorted(bundle_files, key=lambda bundle_file: (export_time(bundle_file), bundle_file))
+
+
+def resource_id(entry):
+    # Logical id in the form Type/id, as used in the generated templates (e.g. Condition/ChronicLungDisease-...),
+    # None for an entry without resource id and request url (or which is not an object)
+    if not isinstance(entry, dict):
+        return None
+    resource = entry.get("resource")
+    if isinstance(resource, dict) and "resourceType" in resource and "id" in resource:
+        return f"{resource['resourceType']}/{resource['id']}"
+    request = entry.get("request")
+    url = request.get("url") if isinstance(request, dict) else None
+    return url.split("?")[0] if isinstance(url, str) and "/" in url else None
+
+
+def is_delete(entry):
+    # DELETE entries, and entries without a resource, remove the resource in the target
+    request = entry.get("request")
+    return (isinstance(request, dict) and request.get("method") == "DELETE") or not isinstance(entry.get("resource"), dict)
+
+
+def template_key(res_id):
+    # Drops the trailing CentraXX ids (crf, patient or visit item id, iteration) to get the id prefix set by the
+    # template, e.g. Observation/LaborValue-crp-12-345 -> Observation/LaborValue-crp
+    return _trailing_ids.sub("", res_id) or res_id
@@ -0,0 +1,118 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from bundle_stream import is_delete, iter_entries, list_bundle_files, resource_id
+
+# Approximate amount of exported data per temporary shard. Only one shard is held in memory while deduplicating.
+SHARD_SIZE_MB = 64
+
+# Marks a deleted resource in the temporary shards
+TOMBSTONE = "-"
+
+
+def resource_type_order(mapping_config_file):
+    # Resource types in the order of their first mapping in ExportResourceMappingConfig.json, Patient always first
+    with open(mapping_config_file, "r", encoding="utf-8") as f:
+        mappings = json.load(f)["mappings"]
+
+    order = ["Patient"]
+    for mapping in mappings:
+        if mapping["exportToFhirResource"] not in order:
+            order.append(mapping["exportToFhirResource"])
+    return order
+
+
+def split_into_shards(bundle_files, shard_dir, nb_shards):
+    # Pass 1: distribute all entries by id over the shards, keeping the export order inside each shard
+    shards = [open(os.path.join(shard_dir, f"shard_{i}.txt"), "w", encoding="utf-8") for i in range(nb_shards)]
+    nb_entries = 0
+    try:
+        for bundle_file in bundle_files:
+            for entry in iter_entries(bundle_file):
+                res_id = resource_id(entry)
+                if res_id is None:
+                    continue
+                nb_entries += 1
+                digest = hashlib.blake2b(res_id.encode("utf-8"), digest_size=8).digest()
+                shard = shards[int.from_bytes(digest, "little") % nb_shards]
+
+                if is_delete(entry):
+                    shard.write(f"{res_id}\t{TOMBSTONE}\n")
+                else:
+                    shard.write(f"{res_id}\t{json.dumps(entry['resource'], separators=(',', ':'))}\n")
+    finally:
+        for shard in shards:
+            shard.close()
+    return nb_entries
+
+
+def write_ndjson(shard_dir, nb_shards, output_folder):
+    # Pass 2: keep the last version of each id and append it to the NDJSON file of its resource type
+    outputs = {}
+    counts = {}
+    try:
+        for i in range(nb_shards):
+            latest = {}
+            with open(os.path.join(shard_dir, f"shard_{i}.txt"), "r", encoding="utf-8") as f:
+                for line in f:
+                    res_id, resource = line.rstrip("\n").split("\t", 1)
+                    latest[res_id] = resource
+
+            for res_id, resource in latest.items():
+                if resource == TOMBSTONE:
+                    continue
+                res_type = res_id.split("/")[0]
+                if res_type not in outputs:
+                    outputs[res_type] = open(os.path.join(output_folder, f"{res_type}.ndjson"), "w", encoding="utf-8")
+                    counts[res_type] = 0
+                outputs[res_type].write(resource + "\n")
+                counts[res_type] += 1
+    finally:
+        for output in outputs.values():
+            output.close()
+    return counts
+
+
+def convert(export_folder, output_folder, mapping_config_file, shard_size_mb=SHARD_SIZE_MB):
+    bundle_files = list_bundle_files(export_folder)
+    export_size = sum(os.path.getsize(bundle_file) for bundle_file in bundle_files)
+    nb_shards = max(1, export_size // (shard_size_mb * 1024 * 1024) + 1)
+
+    os.makedirs(output_folder, exist_ok=True)
+    shard_dir = tempfile.mkdtemp(prefix="ndjson_shards_", dir=output_folder)
+    try:
+        nb_entries = split_into_shards(bundle_files, shard_dir, nb_shards)
+        counts = write_ndjson(shard_dir, nb_shards, output_folder)
+    finally:
+        shutil.rmtree(shard_dir)
+
+    # Bulk import manifest, listing the NDJSON files in referential order
+    order = resource_type_order(mapping_config_file)
+    res_types = sorted(counts, key=lambda res_type: (order.index(res_type) if res_type in order else len(order), res_type))
+    manifest = {
+        "inputFormat": "application/fhir+ndjson",
+        "input": [{"type": res_type, "url": f"{res_type}.ndjson", "count": counts[res_type]} for res_type in res_types],
+    }
+    with open(os.path.join(output_folder, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"{len(bundle_files)} bundles, {nb_entries} entries, {sum(counts.values())} resources after deduplication")
+    for res_input in manifest["input"]:
+        print(f"  {res_input['url']:<35} {res_input['count']:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the FHIR bundles of a file system export into one NDJSON "
+                                                 "file per resource type for bulk loading.")
+    parser.add_argument("export_folder", help="exportFolder of the ProjectConfig.json")
+    parser.add_argument("output_folder", help="folder for the NDJSON files and the manifest.json")
+    parser.add_argument("mapping_config", help="ExportResourceMappingConfig.json used for the export")
+    parser.add_argument("--shard-size-mb", type=int, default=SHARD_SIZE_MB,
+                        help="exported data per temporary shard, limits the memory used for deduplication")
+    args = parser.parse_args()
+
+    convert(args.export_folder, args.output_folder, args.mapping_config, args.shard_size_mb)
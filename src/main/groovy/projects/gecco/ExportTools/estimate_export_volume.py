@@ -0,0 +1,210 @@
+import argparse
+import csv
+import importlib.util
+import json
+import math
+import os
+import re
+
+# Assumed serialized size of a resource if no analyze_export.py report is given
+DEFAULT_RESOURCE_BYTES = 1500
+
+# fullUrl and request of each bundle entry, and the bundle frame itself
+ENTRY_OVERHEAD_BYTES = 150
+BUNDLE_OVERHEAD_BYTES = 100
+
+_crf_name_pattern = re.compile(r'crfName != "([^"]+)"')
+_parameter_code_pattern = re.compile(r'"([^"]+)" == it\[CrfItem\.TEMPLATE]')
+_day_names = {"SUN": 0, "MON": 1, "TUE": 2, "WED": 3, "THU": 4, "FRI": 5, "SAT": 6}
+
+# GroovyGenerator of the GECCO CRF mappings, which holds the generator modules of all generated projects
+DEFAULT_GENERATOR_FOLDER = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "crf",
+                                                         "GroovyGenerator"))
+
+
+def load_generator_module(name):
+    # Module of the GroovyGenerator only using the standard library, loaded from its file without changing sys.path
+    path = os.path.join(DEFAULT_GENERATOR_FOLDER, name + ".py")
+    spec = importlib.util.spec_from_file_location(f"groovy_generator_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_sheet_codes(generator_folder):
+    # Generated script name -> CentraXX parameter codes of its values sheet row, from the code catalog of the last
+    # generation: the same sheet rows the generator rendered the scripts of the mapping config from
+    code_catalog = load_generator_module("code_catalog")
+    template_cache = load_generator_module("template_cache")
+    catalog_file = template_cache.cache_path(generator_folder, code_catalog.CATALOG_FILE_NAME)
+    if not os.path.isfile(catalog_file):
+        raise SystemExit(f"No code catalog {catalog_file}, run main.py of the GroovyGenerator first")
+
+    catalog = code_catalog.open_catalog(catalog_file, generator_folder)
+    try:
+        codes = {}
+        for result in code_catalog.query(catalog, system="ParameterCode"):
+            for script_name in result["scripts"]:
+                codes.setdefault(script_name, []).append(result["code"])
+        return codes
+    finally:
+        catalog.close()
+
+
+def load_fill_statistics(stats_file):
+    # CSV with the columns CrfName, ParameterCode, FilledRate and optionally CrfsPerPatient
+    fill_rates = {}
+    crfs_per_patient = {}
+    with open(stats_file, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            if row.get("ParameterCode"):
+                fill_rates[row["ParameterCode"]] = float(row["FilledRate"])
+            if row.get("CrfsPerPatient"):
+                crfs_per_patient[row["CrfName"]] = float(row["CrfsPerPatient"])
+    return fill_rates, crfs_per_patient
+
+
+def describe_template(template_file):
+    # CRF name gate and the CRF item codes read by a groovy script
+    if not os.path.isfile(template_file):
+        return None, []
+    with open(template_file, "r", encoding="utf-8") as f:
+        script = f.read()
+    crf_name = _crf_name_pattern.search(script)
+    return crf_name.group(1) if crf_name else None, _parameter_code_pattern.findall(script)
+
+
+def count_cron_values(field, low, high, names=None):
+    # Number of values matched by one field of a spring cron expression
+    matched = set()
+    for part in field.upper().split(","):
+        for name, value in (names or {}).items():
+            part = part.replace(name, str(value))
+        step = 1
+        if "/" in part:
+            part, step = part.split("/")
+            step = int(step)
+        if part in ("*", "?"):
+            start, end = low, high
+        elif "-" in part:
+            start, end = map(int, part.split("-"))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        matched.update(range(start, end + 1, step))
+    return len(matched)
+
+
+def exports_per_day(cron):
+    second, minute, hour, day_of_month, month, day_of_week = cron.split()
+    per_day = count_cron_values(second, 0, 59) * count_cron_values(minute, 0, 59) * count_cron_values(hour, 0, 23)
+    if day_of_week not in ("*", "?"):
+        per_day *= count_cron_values(day_of_week, 0, 6, _day_names) / 7
+    if day_of_month not in ("*", "?"):
+        per_day *= count_cron_values(day_of_month, 1, 31) / 30.44
+    if month not in ("*", "?"):
+        per_day *= count_cron_values(month, 1, 12) / 12
+    return per_day
+
+
+def estimate(mapping_config_file, generator_folder, stats_file, project_config_file, nb_patients,
+             resource_sizes_file=None, default_fill_rate=1.0):
+    with open(mapping_config_file, "r", encoding="utf-8") as f:
+        mappings = json.load(f)["mappings"]
+    with open(project_config_file, "r", encoding="utf-8") as f:
+        project_config = json.load(f)
+
+    resource_bytes = {}
+    if resource_sizes_file:
+        with open(resource_sizes_file, "r", encoding="utf-8") as f:
+            resource_bytes = json.load(f)["averageBytesPerResource"]
+
+    sheet_codes = load_sheet_codes(generator_folder)
+    fill_rates, crfs_per_patient = load_fill_statistics(stats_file)
+    scripts_folder = os.path.dirname(mapping_config_file)
+
+    rows = []
+    for mapping in mappings:
+        template_name = mapping["transformByTemplate"]
+        res_type = mapping["exportToFhirResource"]
+        crf_name, codes = describe_template(os.path.join(scripts_folder, template_name + ".groovy"))
+
+        # Generated scripts fire on the parameter codes of their sheet row, constant ones on any of their CRF items
+        if template_name in sheet_codes:
+            codes = sheet_codes[template_name]
+
+        if mapping["selectFromCxxEntity"] != "STUDY_VISIT_ITEM":
+            per_patient = 1.0
+        else:
+            # A script without CRF name gate runs for every approved visit item of the patient
+            visits = crfs_per_patient.get(crf_name, 1.0) if crf_name else sum(crfs_per_patient.values()) or 1.0
+            fill_rate = max((fill_rates.get(code, default_fill_rate) for code in codes), default=1.0)
+            per_patient = visits * fill_rate
+
+        size = resource_bytes.get(res_type, DEFAULT_RESOURCE_BYTES) + ENTRY_OVERHEAD_BYTES
+        rows.append({"template": template_name, "resource": res_type, "crfName": crf_name,
+                     "resourcesPerPatient": per_patient, "bytesPerPatient": per_patient * size})
+
+    page_size = project_config["pageSize"]["value"]
+    resources_per_patient = sum(row["resourcesPerPatient"] for row in rows)
+    resources_per_export = resources_per_patient * nb_patients
+    bundles_per_export = math.ceil(resources_per_export / page_size)
+    bytes_per_export = sum(row["bytesPerPatient"] for row in rows) * nb_patients + bundles_per_export * BUNDLE_OVERHEAD_BYTES
+    per_day = exports_per_day(project_config["exportInterval"]["value"])
+
+    return {
+        "mappings": rows,
+        "pageSize": page_size,
+        "exportInterval": project_config["exportInterval"]["value"],
+        "scheduledExportEnable": project_config["scheduledExportEnable"]["value"],
+        "patients": nb_patients,
+        "resourcesPerPatient": round(resources_per_patient, 2),
+        "bytesPerPatient": round(bytes_per_export / nb_patients) if nb_patients else 0,
+        "resourcesPerExport": round(resources_per_export),
+        "bundlesPerExport": bundles_per_export,
+        "bytesPerExport": round(bytes_per_export),
+        "exportsPerDay": round(per_day, 3),
+        "bytesPerDay": round(bytes_per_export * per_day),
+    }
+
+
+def print_estimation(estimation, top):
+    print(f"Resources per patient: {estimation['resourcesPerPatient']} (~{estimation['bytesPerPatient']} bytes)")
+    print(f"Per export of {estimation['patients']} patients: {estimation['resourcesPerExport']} resources, "
+          f"{estimation['bundlesPerExport']} bundles (pageSize {estimation['pageSize']}), "
+          f"{estimation['bytesPerExport'] / 1024 / 1024:.1f} MiB")
+    print(f"Export interval '{estimation['exportInterval']}': {estimation['exportsPerDay']} exports per day, "
+          f"{estimation['bytesPerDay'] / 1024 / 1024:.1f} MiB per day")
+    if not estimation["scheduledExportEnable"]:
+        print("Note: scheduledExportEnable is false, the interval only applies once the scheduled export is enabled")
+
+    print("\nLargest mappings per patient:")
+    for row in sorted(estimation["mappings"], key=lambda row: -row["bytesPerPatient"])[:top]:
+        print(f"  {row['template']:<60} {row['resource']:<20} {row['resourcesPerPatient']:>8.2f} resources "
+              f"{row['bytesPerPatient']:>10.0f} bytes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estimate FHIR resources and bytes exported per patient and per "
+                                                 "export interval from the mapping config and CRF fill statistics.")
+    parser.add_argument("mapping_config", help="generated ExportResourceMappingConfig.json (next to the scripts)")
+    parser.add_argument("stats", help="CSV with the columns CrfName, ParameterCode, FilledRate, CrfsPerPatient")
+    parser.add_argument("--generator", default=DEFAULT_GENERATOR_FOLDER,
+                        help="GroovyGenerator folder that generated the scripts (default: %(default)s)")
+    parser.add_argument("--project-config", help="ProjectConfig.json (default: next to the mapping config)")
+    parser.add_argument("--patients", type=int, default=1000, help="number of exported patients")
+    parser.add_argument("--resource-sizes", help="json report of analyze_export.py with the bytes per resource type")
+    parser.add_argument("--default-fill-rate", type=float, default=1.0,
+                        help="fill rate of CRF items missing in the statistics")
+    parser.add_argument("--top", type=int, default=20, help="number of mappings listed")
+    parser.add_argument("--json", dest="json_file", help="write the estimation to this json file")
+    args = parser.parse_args()
+
+    project_config_path = args.project_config or os.path.join(os.path.dirname(args.mapping_config), "ProjectConfig.json")
+    export_estimation = estimate(args.mapping_config, args.generator, args.stats, project_config_path, args.patients,
+                                 args.resource_sizes, args.default_fill_rate)
+    print_estimation(export_estimation, args.top)
+
+    if args.json_file:
+        with open(args.json_file, "w") as f:
+            json.dump(export_estimation, f, indent=2)
@@ -0,0 +1,127 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from bundle_stream import is_delete, iter_entries, list_bundle_files, resource_id
+
+# Meta elements that change with every export, even if the resource content stays the same
+VOLATILE_META = ("lastUpdated", "versionId")
+
+
+def open_index(index_file):
+    # Resource id digest -> content digest. Digests keep the index compact for tens of millions of ids.
+    index = sqlite3.connect(index_file)
+    index.execute("PRAGMA journal_mode=WAL")
+    index.execute("PRAGMA synchronous=NORMAL")
+    index.execute("CREATE TABLE IF NOT EXISTS resource (id BLOB PRIMARY KEY, content BLOB NOT NULL) WITHOUT ROWID")
+    index.execute("CREATE TABLE IF NOT EXISTS bundle_file (path TEXT PRIMARY KEY, size INTEGER NOT NULL)")
+    index.commit()
+    return index
+
+
+def content_digest(resource):
+    meta = resource.get("meta")
+    if meta and any(key in meta for key in VOLATILE_META):
+        resource = dict(resource, meta={key: value for key, value in meta.items() if key not in VOLATILE_META})
+    content = json.dumps(resource, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(content, digest_size=16).digest()
+
+
+def id_digest(res_id):
+    return hashlib.blake2b(res_id.encode("utf-8"), digest_size=12).digest()
+
+
+def track_bundle(index, bundle_file, output_file):
+    # Writes the new, changed and deleted resources of one exported bundle into output_file
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    tmp_file = output_file + ".tmp"
+    nb_entries = nb_changed = nb_deleted = 0
+
+    try:
+        with open(tmp_file, "w", encoding="utf-8") as out:
+            out.write('{"resourceType":"Bundle","type":"transaction","entry":[')
+            for entry in iter_entries(bundle_file):
+                res_id = resource_id(entry)
+                if res_id is None:
+                    continue
+                nb_entries += 1
+                key = id_digest(res_id)
+                known = index.execute("SELECT content FROM resource WHERE id = ?", (key,)).fetchone()
+
+                if is_delete(entry):
+                    if known is None:
+                        continue
+                    index.execute("DELETE FROM resource WHERE id = ?", (key,))
+                    entry = {"request": {"method": "DELETE", "url": res_id}}
+                    nb_deleted += 1
+                else:
+                    digest = content_digest(entry["resource"])
+                    if known is not None and known[0] == digest:
+                        continue
+                    index.execute("INSERT OR REPLACE INTO resource (id, content) VALUES (?, ?)", (key, digest))
+                    nb_changed += 1
+
+                out.write(("," if nb_changed + nb_deleted > 1 else "") + json.dumps(entry, separators=(",", ":")))
+            out.write("]}")
+    except ValueError:
+        os.unlink(tmp_file)
+        raise
+
+    if nb_changed + nb_deleted:
+        os.replace(tmp_file, output_file)
+    else:
+        os.unlink(tmp_file)
+
+    # The index is committed after the delta is written: after a crash, resources are emitted again instead of lost
+    index.execute("INSERT OR REPLACE INTO bundle_file (path, size) VALUES (?, ?)",
+                  (os.path.abspath(bundle_file), os.path.getsize(bundle_file)))
+    index.commit()
+    return nb_entries, nb_changed, nb_deleted
+
+
+def track_export(export_folder, downstream_folder, index_file):
+    os.makedirs(downstream_folder, exist_ok=True)
+    index = open_index(index_file)
+    processed = dict(index.execute("SELECT path, size FROM bundle_file"))
+
+    totals = [0, 0, 0]
+    nb_bundles = 0
+    for bundle_file in list_bundle_files(export_folder):
+        if processed.get(os.path.abspath(bundle_file)) == os.path.getsize(bundle_file):
+            continue
+        try:
+            # Same path below the downstream folder, bundles of the sub folders of shard projects keep their names
+            counts = track_bundle(index, bundle_file,
+                                  os.path.join(downstream_folder, os.path.relpath(bundle_file, export_folder)))
+        except ValueError as e:
+            # Bundle still being written by CentraXX, retried with the next scan
+            index.rollback()
+            print('Skipped %s. Reason: %s' % (bundle_file, e))
+            continue
+        totals = [total + count for total, count in zip(totals, counts)]
+        nb_bundles += 1
+    index.close()
+
+    if nb_bundles:
+        print(f"{nb_bundles} new bundles: {totals[0]} entries, {totals[1]} new or changed, {totals[2]} deleted, "
+              f"{totals[0] - totals[1] - totals[2]} unchanged")
+    return nb_bundles
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Forward only new, changed and deleted resources of an incremental "
+                                                 "file system export to a downstream folder.")
+    parser.add_argument("export_folder", help="exportFolder of the ProjectConfig.json")
+    parser.add_argument("downstream_folder", help="folder receiving the delta bundles")
+    parser.add_argument("--index", default="delta_index.sqlite", help="index of resource id to content hash")
+    parser.add_argument("--watch", type=float, help="keep scanning the export folder every WATCH seconds")
+    args = parser.parse_args()
+
+    while True:
+        track_export(args.export_folder, args.downstream_folder, args.index)
+        if args.watch is None:
+            break
+        time.sleep(args.watch)
@@ -0,0 +1,172 @@
+import argparse
+import json
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Used by CentraXX for all resource types missing in BundleRequestMethodConfig.json
+DEFAULT_HTTP_METHOD = "PUT"
+
+
+def operation_outcome(diagnostics):
+    return {"resourceType": "OperationOutcome",
+            "issue": [{"severity": "error", "code": "invalid", "diagnostics": diagnostics}]}
+
+
+def invalid_entry(entries):
+    # Diagnostics of the first entry without request.method and request.url, None if all entries are valid.
+    # A transaction with a malformed entry is rejected as a whole, as a FHIR server would do.
+    if not isinstance(entries, list):
+        return "Bundle.entry is not a list"
+    for i, entry in enumerate(entries):
+        request = entry.get("request") if isinstance(entry, dict) else None
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str) \
+                or not isinstance(request.get("url"), str):
+            return f"Bundle.entry[{i}] has no request with method and url"
+    return None
+
+
+class UploadStats:
+    # Throughput and payload sizes of all transactions received by the stand-in
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = None
+            self.finished = None
+            self.requests = 0
+            self.resources = 0
+            self.rejected = 0
+            self.payload_bytes = 0
+            self.max_payload_bytes = 0
+
+    def record(self, started, finished, nb_resources, nb_rejected, payload_bytes):
+        with self.lock:
+            self.started = started if self.started is None else min(self.started, started)
+            self.finished = finished if self.finished is None else max(self.finished, finished)
+            self.requests += 1
+            self.resources += nb_resources
+            self.rejected += nb_rejected
+            self.payload_bytes += payload_bytes
+            self.max_payload_bytes = max(self.max_payload_bytes, payload_bytes)
+
+    def as_dict(self):
+        with self.lock:
+            duration = (self.finished - self.started) if self.requests else 0
+            return {
+                "requests": self.requests,
+                "resources": self.resources,
+                "rejected": self.rejected,
+                "payloadBytes": self.payload_bytes,
+                "maxPayloadBytes": self.max_payload_bytes,
+                "meanPayloadBytes": round(self.payload_bytes / self.requests) if self.requests else 0,
+                "seconds": round(duration, 3),
+                "resourcesPerSecond": round(self.resources / duration, 1) if duration else 0,
+            }
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # POST <base> accepts a transaction bundle, GET <base>/$stats returns the statistics, DELETE <base>/$stats resets them
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/fhir+json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("$stats"):
+            self.send_json(200, self.server.stats.as_dict())
+        else:
+            self.send_json(404, {"resourceType": "OperationOutcome"})
+
+    def do_DELETE(self):
+        if self.path.rstrip("/").endswith("$stats"):
+            self.server.stats.reset()
+            self.send_json(200, {})
+        else:
+            self.send_json(404, {"resourceType": "OperationOutcome"})
+
+    def do_POST(self):
+        started = time.perf_counter()
+        payload = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            bundle = json.loads(payload)
+        except ValueError as e:
+            self.send_json(400, operation_outcome(f"Invalid JSON: {e}"))
+            return
+        if not isinstance(bundle, dict) or bundle.get("resourceType") != "Bundle" \
+                or bundle.get("type") not in ("transaction", "batch"):
+            self.send_json(400, operation_outcome("Expected a transaction or batch Bundle"))
+            return
+
+        entries = bundle.get("entry", [])
+        error = invalid_entry(entries)
+        if error:
+            self.send_json(400, operation_outcome(error))
+            return
+        responses = []
+        nb_rejected = 0
+
+        # A transaction system processes one transaction after another
+        with self.server.transaction_lock:
+            time.sleep((self.server.request_latency_ms + len(entries) * self.server.resource_latency_ms) / 1000)
+            for entry in entries:
+                method = entry["request"]["method"]
+                url = entry["request"]["url"]
+                if method == "DELETE":
+                    self.server.known_ids.discard(url)
+                    responses.append({"response": {"status": "204 No Content"}})
+                elif method != self.server.http_methods.get(url.split("/")[0], DEFAULT_HTTP_METHOD):
+                    nb_rejected += 1
+                    responses.append({"response": {"status": "400 Bad Request"}})
+                elif url in self.server.known_ids:
+                    responses.append({"response": {"status": "200 OK"}})
+                else:
+                    self.server.known_ids.add(url)
+                    responses.append({"response": {"status": "201 Created"}})
+
+        self.server.stats.record(started, time.perf_counter(), len(entries), nb_rejected, len(payload))
+        self.send_json(200, {"resourceType": "Bundle", "type": bundle["type"] + "-response", "entry": responses})
+
+
+def make_server(port, bundle_request_method_config=None, request_latency_ms=0.0, resource_latency_ms=0.0,
+                transactional=True, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), StandInHandler)
+    server.daemon_threads = True
+    server.http_methods = {}
+    if bundle_request_method_config:
+        with open(bundle_request_method_config, "r", encoding="utf-8") as f:
+            server.http_methods = json.load(f)["resourceTypeToHttpMethod"]
+    server.request_latency_ms = request_latency_ms
+    server.resource_latency_ms = resource_latency_ms
+    server.transaction_lock = threading.Lock() if transactional else nullcontext()
+    server.known_ids = set()
+    server.stats = UploadStats()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the uploadUrl FHIR endpoint of an export project.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--bundle-request-method-config", help="BundleRequestMethodConfig.json to check the "
+                                                               "HTTP method of each entry")
+    parser.add_argument("--request-latency-ms", type=float, default=0.0, help="simulated latency per bundle")
+    parser.add_argument("--resource-latency-ms", type=float, default=0.0, help="simulated latency per resource")
+    parser.add_argument("--parallel-transactions", action="store_true",
+                        help="process bundles in parallel instead of one transaction at a time")
+    args = parser.parse_args()
+
+    standin = make_server(args.port, args.bundle_request_method_config, args.request_latency_ms,
+                          args.resource_latency_ms, not args.parallel_transactions)
+    print(f"Listening on http://127.0.0.1:{args.port}/fhir (statistics: GET /fhir/$stats)")
+    standin.serve_forever()
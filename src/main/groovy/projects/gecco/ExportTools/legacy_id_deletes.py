@@ -0,0 +1,58 @@
+import argparse
+import json
+import re
+
+from bundle_stream import is_delete, iter_entries, list_bundle_files, resource_id
+
+# Ids of resources exported by former versions of the GECCO mappings, which the current mappings no longer produce.
+# The resources stay orphaned in a target system until they are deleted: (old id, test of the exported resource)
+DISCHARGE_IDENTIFIER_SYSTEM = "http://www.acme.com/identifiers/patient"
+LEGACY_IDS = [
+    # All iterations of the history of travel and vaccination shared one id, now HistoryOfTravel-<iteration>-<id>
+    (re.compile(r"Observation/HistoryOfTravel-\d+"), None),
+    (re.compile(r"Immunization/HistoryOfVaccination-\d+"), None),
+    # The discharge PCR had the id prefix of the laboratory PCR, now SarsCov2RT-PCR-Discharge-<id>. Only the discharge
+    # observations carry this identifier system.
+    (re.compile(r"Observation/SarsCov2RT-PCR-\d+"),
+     lambda resource: any(identifier.get("system") == DISCHARGE_IDENTIFIER_SYSTEM
+                          for identifier in resource.get("identifier", []))),
+]
+
+
+def is_legacy(res_id, resource):
+    for pattern, test in LEGACY_IDS:
+        if pattern.fullmatch(res_id) and (test is None or test(resource)):
+            return True
+    return False
+
+
+def legacy_ids(export_folders):
+    # Legacy ids whose last exported version still exists (not deleted, not exported again by a current mapping)
+    last_versions = {}
+    for export_folder in export_folders:
+        for bundle_file in list_bundle_files(export_folder):
+            for entry in iter_entries(bundle_file):
+                res_id = resource_id(entry)
+                if res_id is None or not any(pattern.fullmatch(res_id) for pattern, _ in LEGACY_IDS):
+                    continue
+                last_versions[res_id] = not is_delete(entry) and is_legacy(res_id, entry["resource"])
+    return sorted(res_id for res_id, legacy in last_versions.items() if legacy)
+
+
+def write_delete_bundle(res_ids, output_file):
+    bundle = {"resourceType": "Bundle", "type": "transaction",
+              "entry": [{"request": {"method": "DELETE", "url": res_id}} for res_id in res_ids]}
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(bundle, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a transaction bundle deleting the resources exported under "
+                                                 "ids the current GECCO mappings no longer produce.")
+    parser.add_argument("export_folders", nargs="+", help="export folders written before the id change")
+    parser.add_argument("output", help="bundle file to write (one DELETE entry per legacy id)")
+    args = parser.parse_args()
+
+    ids = legacy_ids(args.export_folders)
+    write_delete_bundle(ids, args.output)
+    print(f"{len(ids)} legacy resource ids written to {args.output}")
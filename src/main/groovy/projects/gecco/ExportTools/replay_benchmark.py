@@ -0,0 +1,150 @@
+import argparse
+import base64
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from analyze_export import distribution
+from bundle_stream import iter_entries, list_bundle_files
+from fhir_upload_standin import make_server
+
+# Page sizes and concurrency levels replayed by default
+PAGE_SIZES = [10, 25, 50, 100, 250, 500]
+CONCURRENCY_LEVELS = [1, 2, 4]
+
+# Smaller page sizes are preferred as long as they reach this share of the best throughput
+THROUGHPUT_TOLERANCE = 0.95
+
+
+def load_entries(export_folder, max_resources):
+    # Serialized entries of the first exported bundles, they are the resource mix replayed with every setting
+    entries = []
+    for bundle_file in list_bundle_files(export_folder):
+        for entry in iter_entries(bundle_file):
+            entries.append(json.dumps(entry, separators=(",", ":")))
+            if len(entries) >= max_resources:
+                return entries
+    return entries
+
+
+def build_bundles(entries, page_size):
+    bundles = []
+    for i in range(0, len(entries), page_size):
+        bundles.append(('{"resourceType":"Bundle","type":"transaction","entry":['
+                        + ",".join(entries[i:i + page_size]) + "]}").encode("utf-8"))
+    return bundles
+
+
+def post_bundle(url, bundle, headers):
+    # Latency and HTTP status of one bundle, a rejected bundle (4xx/5xx) is recorded and does not end the replay
+    request = urllib.request.Request(url, data=bundle, headers=headers, method="POST")
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    return time.perf_counter() - started, status
+
+
+def replay(url, entries, page_size, concurrency, headers):
+    bundles = build_bundles(entries, page_size)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        posted = list(executor.map(lambda bundle: post_bundle(url, bundle, headers), bundles))
+    seconds = time.perf_counter() - started
+    latencies = [latency for latency, _ in posted]
+    statuses = Counter(status for _, status in posted)
+    return {
+        "pageSize": page_size,
+        "concurrency": concurrency,
+        "bundles": len(bundles),
+        "failedBundles": sum(count for status, count in statuses.items() if status >= 400),
+        "statusCodes": {str(status): count for status, count in sorted(statuses.items())},
+        "seconds": round(seconds, 3),
+        "resourcesPerSecond": round(len(entries) / seconds, 1),
+        "meanPayloadBytes": round(sum(len(bundle) for bundle in bundles) / len(bundles)),
+        "maxPayloadBytes": max(len(bundle) for bundle in bundles),
+        "requestMillis": {key: round(value * 1000, 1) for key, value in distribution(latencies).items()},
+    }
+
+
+def recommend(results, max_payload_bytes=None):
+    # Best throughput, but the smallest page size within the tolerance (smaller pages are cheaper to retry).
+    # Settings with rejected bundles are not recommended.
+    candidates = [result for result in results if not result["failedBundles"]
+                  and (max_payload_bytes is None or result["maxPayloadBytes"] <= max_payload_bytes)]
+    if not candidates:
+        return None
+    best = max(result["resourcesPerSecond"] for result in candidates)
+    good_enough = [result for result in candidates if result["resourcesPerSecond"] >= best * THROUGHPUT_TOLERANCE]
+    return min(good_enough, key=lambda result: (result["pageSize"], result["concurrency"]))
+
+
+def run_benchmark(entries, url, page_sizes, concurrency_levels, user=None, password=None):
+    headers = {"Content-Type": "application/fhir+json"}
+    if user:
+        headers["Authorization"] = "Basic " + base64.b64encode(f"{user}:{password}".encode("utf-8")).decode("ascii")
+
+    results = []
+    for page_size in page_sizes:
+        for concurrency in concurrency_levels:
+            result = replay(url, entries, page_size, concurrency, headers)
+            results.append(result)
+            print(f"pageSize {page_size:>5}  concurrency {concurrency:>3}  {result['resourcesPerSecond']:>10} res/s  "
+                  f"mean payload {result['meanPayloadBytes']:>9} B  p90 request {result['requestMillis']['p90']} ms"
+                  + (f"  {result['failedBundles']} failed bundles {result['statusCodes']}" if result["failedBundles"]
+                     else ""))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay exported bundles with different page sizes and concurrency "
+                                                 "levels and recommend a pageSize for the ProjectConfig.json.")
+    parser.add_argument("export_folder", help="exportFolder with bundles of the real resource mix")
+    parser.add_argument("--url", help="FHIR base url to replay against. Without, a local stand-in is started.")
+    parser.add_argument("--user", help="BasicAuth user (uploadUser)")
+    parser.add_argument("--password", help="BasicAuth password (uploadPassword)")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=PAGE_SIZES)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=CONCURRENCY_LEVELS)
+    parser.add_argument("--max-resources", type=int, default=5000, help="number of exported entries replayed")
+    parser.add_argument("--max-payload-bytes", type=int, help="upper limit of a bundle accepted by the target")
+    parser.add_argument("--bundle-request-method-config", help="BundleRequestMethodConfig.json for the stand-in")
+    parser.add_argument("--request-latency-ms", type=float, default=20.0, help="stand-in latency per bundle")
+    parser.add_argument("--resource-latency-ms", type=float, default=1.0, help="stand-in latency per resource")
+    parser.add_argument("--parallel-transactions", action="store_true",
+                        help="let the stand-in process bundles in parallel")
+    parser.add_argument("--json", dest="json_file", help="write all results to this json file")
+    args = parser.parse_args()
+
+    replay_entries = load_entries(args.export_folder, args.max_resources)
+    if not replay_entries:
+        raise SystemExit(f"No bundle entries found in {args.export_folder}")
+
+    target_url = args.url
+    if target_url is None:
+        standin = make_server(0, args.bundle_request_method_config, args.request_latency_ms,
+                              args.resource_latency_ms, not args.parallel_transactions)
+        threading.Thread(target=standin.serve_forever, daemon=True).start()
+        target_url = f"http://127.0.0.1:{standin.server_address[1]}/fhir"
+
+    print(f"Replaying {len(replay_entries)} entries against {target_url}")
+    benchmark_results = run_benchmark(replay_entries, target_url, args.page_sizes, args.concurrency,
+                                      args.user, args.password)
+
+    recommendation = recommend(benchmark_results, args.max_payload_bytes)
+    if recommendation is None:
+        print("\nNo page size stays below the maximal payload size without failed bundles")
+    else:
+        print(f"\nRecommended pageSize: {recommendation['pageSize']} "
+              f"({recommendation['resourcesPerSecond']} resources/s with concurrency {recommendation['concurrency']})")
+
+    if args.json_file:
+        with open(args.json_file, "w") as f:
+            json.dump({"results": benchmark_results, "recommendation": recommendation}, f, indent=2)
@@ -1,12 +1,15 @@
-import pandas as pd
-import numpy as np
+import os
+import sys
+
+src = os.path.dirname(os.path.abspath(__file__)) + os.sep
+sys.path.insert(0, os.path.dirname(os.path.dirname(src.rstrip(os.sep))))
+import code_catalog
 
-src = f"./GroovyGenerator/General/Consent/"
 values_file = "values_policy.xlsx"
 
-# Load corresponding values from excel
-values_df = pd.read_excel(src + values_file)
-values_df = values_df.replace(np.nan, '')
+# Load corresponding values from the catalog
+catalog = code_catalog.open_catalog()
+rows = code_catalog.read_rows(catalog, src + values_file)
 
 available_fields = ["Level/Typ", "Code", "Bezeichnung", "Codesystem", "SystemID"]
 
@@ -14,7 +17,7 @@ final_str = """static String[] mapConsentData(final String cxxConsentPart){
   switch(cxxConsentPart) {"""
 
 # Iterate over the diseases from the excel file
-for _, row in values_df.iterrows():
+for row in rows:
     final_str = final_str + f"""
         case ("{row["Bezeichnung"]}"):
       return ["{row["Code"]}", "{row["Bezeichnung"]}"]"""
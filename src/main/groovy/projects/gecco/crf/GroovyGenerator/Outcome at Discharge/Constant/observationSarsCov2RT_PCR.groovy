@@ -37,7 +37,7 @@ observation {
     return
   }
 
-  id = "Observation/SarsCov2RT-PCR-" + context.source[studyVisitItem().id()]
+  id = "Observation/SarsCov2RT-PCR-Discharge-" + context.source[studyVisitItem().id()]
 
   identifier {
     type {
@@ -0,0 +1,5 @@
+# Build from other tools without going through main.py, e.g.
+#   from GroovyGenerator import build
+#   build()                                                  (all study profiles of study_profiles.json)
+#   build(targets=["Anamnesis/Diseases", "chronic_lung"])   (only these scripts, patched into the existing output)
+from .generator import Generator, StudyProfile, build, load_profiles
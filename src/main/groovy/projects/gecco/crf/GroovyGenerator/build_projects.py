@@ -0,0 +1,49 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import generator
+
+# Folder holding all mapping projects (src/main/groovy/projects)
+projects_root = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+
+
+def find_projects(root=projects_root):
+    # Every folder with a GroovyGenerator containing a study_profiles.json is a generated project
+    projects = []
+    for folder, sub_folders, _ in os.walk(root):
+        if os.path.isfile(os.path.join(folder, "GroovyGenerator", generator.PROFILES_FILE_NAME)):
+            projects.append(folder)
+        sub_folders[:] = sorted(sub_folder for sub_folder in sub_folders if sub_folder != "GroovyGenerator")
+    return projects
+
+
+def build_project(project, optimize=False):
+    started = time.perf_counter()
+    profiles = generator.load_profiles(os.path.join(project, "GroovyGenerator", generator.PROFILES_FILE_NAME))
+    nb_files = generator.build(profiles, project, optimize)
+    return project, nb_files, time.perf_counter() - started
+
+
+def build_all(projects, workers=None, optimize=False):
+    # One process per project, each process parses the templates and loads the sheets of its project once
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for project, nb_files, seconds in executor.map(build_project, projects, [optimize] * len(projects)):
+            print(f"{os.path.relpath(project, projects_root)}: {nb_files} files in {seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regenerate all projects under src/main/groovy/projects that have a "
+                                                 "GroovyGenerator with a study_profiles.json.")
+    parser.add_argument("projects", nargs="*", help="project folders to build (default: all generated projects)")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: number of cpus)")
+    parser.add_argument("--optimize", action="store_true", help="run groovy_optimizer.py over the rendered scripts")
+    args = parser.parse_args()
+
+    try:
+        build_all([os.path.abspath(project) for project in args.projects] or find_projects(), args.workers,
+                  args.optimize)
+    except ValueError as error:
+        sys.exit(str(error))
@@ -0,0 +1,191 @@
+import argparse
+import glob
+import json
+import os
+import sqlite3
+
+src = os.path.dirname(os.path.abspath(__file__)) + os.sep
+CATALOG_FILE_NAME = "code_catalog.sqlite"
+catalog_file = src + CATALOG_FILE_NAME
+
+# Code system of the columns used in the values sheets (ParameterCode* columns are CentraXX parameter codes)
+CODE_COLUMNS = {
+    "IdComplement": "IdComplement",
+    "SnomedCode": "SNOMED",
+    "LoincCode": "LOINC",
+    "ATCCode": "ATC",
+    "ICDCode": "ICD",
+    "DCMCode": "DCM",
+    "Code": "Code",
+}
+
+
+def code_system(column):
+    if column.startswith("ParameterCode"):
+        return "ParameterCode"
+    return CODE_COLUMNS.get(column)
+
+
+class _Catalog(sqlite3.Connection):
+    # Connection to the catalog of a GroovyGenerator folder, which may be stored elsewhere (GROOVY_GENERATOR_CACHE_DIR)
+    generator_dir = None
+
+
+def open_catalog(path=catalog_file, generator_dir=None):
+    catalog = sqlite3.connect(path, factory=_Catalog)
+    catalog.generator_dir = generator_dir or os.path.dirname(os.path.abspath(path))
+    catalog.executescript("""
+        CREATE TABLE IF NOT EXISTS sheet (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, mtime REAL NOT NULL,
+                                          size INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS sheet_row (sheet_id INTEGER NOT NULL, row_nb INTEGER NOT NULL, data TEXT NOT NULL,
+                                              PRIMARY KEY (sheet_id, row_nb)) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS code (sheet_id INTEGER NOT NULL, row_nb INTEGER NOT NULL, system TEXT NOT NULL,
+                                         code TEXT NOT NULL);
+        CREATE INDEX IF NOT EXISTS code_system_code ON code (system, code);
+        CREATE INDEX IF NOT EXISTS code_code ON code (code);
+        CREATE TABLE IF NOT EXISTS script (sheet_id INTEGER NOT NULL, row_nb INTEGER NOT NULL, name TEXT NOT NULL,
+                                           PRIMARY KEY (sheet_id, row_nb, name)) WITHOUT ROWID;
+    """)
+    return catalog
+
+
+def catalog_dir(catalog):
+    # Sheets are stored relative to the GroovyGenerator folder of the catalog
+    return catalog.generator_dir
+
+
+def _sheet_key(catalog, values_file):
+    return os.path.relpath(values_file, catalog_dir(catalog)).replace(os.sep, "/")
+
+
+def compile_sheet(catalog, values_file):
+    # Rows are stored as the strings the generators substitute into the templates
+    import numpy as np
+    import pandas as pd
+
+    values_df = pd.read_excel(values_file)
+    values_df = values_df.replace(np.nan, '')
+
+    key = _sheet_key(catalog, values_file)
+    stat = os.stat(values_file)
+    previous = catalog.execute("SELECT id FROM sheet WHERE path = ?", (key,)).fetchone()
+    if previous:
+        for table in ("sheet_row", "code", "script"):
+            catalog.execute(f"DELETE FROM {table} WHERE sheet_id = ?", previous)
+        catalog.execute("DELETE FROM sheet WHERE id = ?", previous)
+    sheet_id = catalog.execute("INSERT INTO sheet (path, mtime, size) VALUES (?, ?, ?)",
+                               (key, stat.st_mtime, stat.st_size)).lastrowid
+
+    for row_nb, (_, row) in enumerate(values_df.iterrows()):
+        data = {str(column): str(value) for column, value in row.items()}
+        catalog.execute("INSERT INTO sheet_row (sheet_id, row_nb, data) VALUES (?, ?, ?)",
+                        (sheet_id, row_nb, json.dumps(data, ensure_ascii=False)))
+        for column, value in data.items():
+            system = code_system(column)
+            if system == "Code" and data.get("Codesystem"):
+                system = data["Codesystem"]
+            if system and value != "":
+                catalog.execute("INSERT INTO code (sheet_id, row_nb, system, code) VALUES (?, ?, ?, ?)",
+                                (sheet_id, row_nb, system, value))
+
+
+def build_catalog(catalog=None, verbose=True):
+    # Compiles every values sheet of the generator, only sheets changed since the last build are read again
+    own_catalog = catalog is None
+    catalog = catalog or open_catalog()
+    known = {path: (mtime, size) for path, mtime, size in catalog.execute("SELECT path, mtime, size FROM sheet")}
+    values_files = sorted(glob.glob(os.path.join(catalog_dir(catalog), "**", "values_*.xlsx"), recursive=True))
+
+    for values_file in values_files:
+        stat = os.stat(values_file)
+        if known.get(_sheet_key(catalog, values_file)) != (stat.st_mtime, stat.st_size):
+            if verbose:
+                print(f"Compiling {values_file}")
+            compile_sheet(catalog, values_file)
+
+    # Forget deleted sheets
+    current = {_sheet_key(catalog, values_file) for values_file in values_files}
+    for sheet_id, path in catalog.execute("SELECT id, path FROM sheet").fetchall():
+        if path not in current:
+            for table in ("sheet_row", "code", "script"):
+                catalog.execute(f"DELETE FROM {table} WHERE sheet_id = ?", (sheet_id,))
+            catalog.execute("DELETE FROM sheet WHERE id = ?", (sheet_id,))
+
+    catalog.commit()
+    if own_catalog:
+        catalog.close()
+
+
+def _sheet_id(catalog, values_file):
+    found = catalog.execute("SELECT id FROM sheet WHERE path = ?", (_sheet_key(catalog, values_file),)).fetchone()
+    if found is None:
+        build_catalog(catalog, verbose=False)
+        found = catalog.execute("SELECT id FROM sheet WHERE path = ?", (_sheet_key(catalog, values_file),)).fetchone()
+    return found[0]
+
+
+def read_rows(catalog, values_file):
+    # Rows of a values sheet as dicts (column name -> value as string), in the order of the sheet
+    sheet_id = _sheet_id(catalog, values_file)
+    return [json.loads(data) for data, in
+            catalog.execute("SELECT data FROM sheet_row WHERE sheet_id = ? ORDER BY row_nb", (sheet_id,))]
+
+
+def record_scripts(catalog, values_file, script_names):
+    # Remembers the name of the groovy script generated from each row (same order as read_rows)
+    sheet_id = _sheet_id(catalog, values_file)
+    recorded = [name for name, in catalog.execute("SELECT name FROM script WHERE sheet_id = ? ORDER BY row_nb",
+                                                  (sheet_id,))]
+    if recorded == list(script_names):
+        return
+    catalog.execute("DELETE FROM script WHERE sheet_id = ?", (sheet_id,))
+    catalog.executemany("INSERT OR IGNORE INTO script (sheet_id, row_nb, name) VALUES (?, ?, ?)",
+                        [(sheet_id, row_nb, name) for row_nb, name in enumerate(script_names)])
+    catalog.commit()
+
+
+def query(catalog, code=None, system=None):
+    # Rows using a code (of a code system), or all codes of a code system
+    sql = """SELECT sheet.path, code.row_nb, code.system, code.code, sheet_row.data,
+                    (SELECT group_concat(name) FROM script
+                     WHERE script.sheet_id = code.sheet_id AND script.row_nb = code.row_nb)
+             FROM code
+             JOIN sheet ON sheet.id = code.sheet_id
+             JOIN sheet_row ON sheet_row.sheet_id = code.sheet_id AND sheet_row.row_nb = code.row_nb
+             WHERE 1 = 1"""
+    params = []
+    if code is not None:
+        sql += " AND code.code = ?"
+        params.append(code)
+    if system is not None:
+        sql += " AND code.system = ?"
+        params.append(system)
+    sql += " ORDER BY code.system, code.code, sheet.path, code.row_nb"
+
+    results = []
+    for path, row_nb, row_system, row_code, data, scripts in catalog.execute(sql, params):
+        results.append({"sheet": path, "row": row_nb, "system": row_system, "code": row_code,
+                        "idComplement": json.loads(data).get("IdComplement", ""),
+                        "scripts": scripts.split(",") if scripts else []})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build and query the code catalog compiled from all values sheets "
+                                                 "(code_catalog.sqlite next to this script, any working directory).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="compile all changed values sheets into the catalog")
+    query_parser = subparsers.add_parser("query", help="look up codes across all values sheets")
+    query_parser.add_argument("code", nargs="?", help="code to look up (all codes of the system if omitted)")
+    query_parser.add_argument("--system", help="code system: " + ", ".join(sorted(set(CODE_COLUMNS.values()) |
+                                                                                     {"ParameterCode"})))
+    args = parser.parse_args()
+
+    code_catalog = open_catalog()
+    if args.command == "build":
+        build_catalog(code_catalog)
+    else:
+        for result in query(code_catalog, args.code, args.system):
+            print(f"{result['system']:<14} {result['code']:<25} {result['sheet']} row {result['row']} "
+                  f"({result['idComplement']}) {' '.join(result['scripts'])}")
+    code_catalog.close()
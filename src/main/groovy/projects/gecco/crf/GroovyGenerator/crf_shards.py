@@ -0,0 +1,72 @@
+import json
+import re
+
+if __package__:
+    from . import groovy_optimizer
+else:
+    import groovy_optimizer
+
+# Splits the mappings of a profile into one export project per CRF checked by the gates of the scripts
+# (crfName != "SarsCov2_..."). Scripts without CRF gate (Patient, Consent) form the General project. A project gets
+# the mappings of other projects only if its scripts reference resources they produce (e.g. Patient/Patient-...),
+# so that every project can be uploaded on its own into a target system checking referential integrity.
+GENERAL_SHARD = "General"
+
+_crf_name_pattern = re.compile(r'crfName != "([^"]+)"')
+_id_pattern = re.compile(r'\bid = "(\w+/[^"/-]+)-')
+_reference_pattern = re.compile(r'\breference = "(\w+/[^"/-]+)-')
+
+
+def code_matches(pattern, script):
+    mask = groovy_optimizer.code_mask(script)
+    return {match.group(1) for match in pattern.finditer(script) if mask[match.start()]}
+
+
+def shard_name(crf_name):
+    # Folder name of the export project of a CRF, e.g. SarsCov2_ANAMNESE_RISIKOFAKTOREN
+    return re.sub(r"[^\w]+", "_", crf_name).strip("_")
+
+
+def describe_script(script):
+    # (CRF names of the gate, ids produced, ids referenced) of a rendered script
+    return sorted(set(_crf_name_pattern.findall(script))), code_matches(_id_pattern, script), \
+        code_matches(_reference_pattern, script)
+
+
+def shard_mappings(mappings, scripts):
+    # scripts: template name -> rendered script. Returns shard name -> (mappings in the order of the mapping config,
+    # number of mappings added as dependencies)
+    described = {name: describe_script(script) for name, script in scripts.items()}
+    producers = {}
+    for index, mapping in enumerate(mappings):
+        for produced in described.get(mapping["transformByTemplate"], ([], set(), set()))[1]:
+            producers.setdefault(produced, []).append(index)
+
+    members = {}
+    for index, mapping in enumerate(mappings):
+        crf_names = described.get(mapping["transformByTemplate"], ([], set(), set()))[0]
+        for crf_name in crf_names or [None]:
+            members.setdefault(shard_name(crf_name) if crf_name else GENERAL_SHARD, set()).add(index)
+
+    shards = {}
+    for shard, indexes in sorted(members.items()):
+        selected = set(indexes)
+        pending = list(indexes)
+        while pending:
+            _, produced, referenced = described.get(mappings[pending.pop()]["transformByTemplate"],
+                                                    ([], set(), set()))
+            for reference in referenced - produced:
+                if any(index in selected for index in producers.get(reference, [])):
+                    continue
+                for index in producers.get(reference, []):
+                    selected.add(index)
+                    pending.append(index)
+        shards[shard] = ([mappings[index] for index in sorted(selected)], len(selected) - len(indexes))
+    return shards
+
+
+def shard_project_config(text, shard):
+    # Each export project writes to its own sub folder of the exportFolder
+    config = json.loads(text)
+    config["exportFolder"]["value"] = config["exportFolder"]["value"].rstrip("/") + "/" + shard
+    return json.dumps(config, indent=2, ensure_ascii=False)
@@ -0,0 +1,575 @@
+import importlib.util
+import json
+import os
+import re
+import sys
+
+# Imported as the GroovyGenerator package or as a module next to main.py (scripts run from this folder)
+if __package__:
+    from . import code_catalog, crf_shards, groovy_optimizer, template_cache, terminology
+else:
+    import code_catalog
+    import crf_shards
+    import groovy_optimizer
+    import template_cache
+    import terminology
+
+# Paths are resolved from this folder, the generator can be run and imported from any working directory
+src = os.path.dirname(os.path.abspath(__file__)) + os.sep
+project_dir = os.path.dirname(os.path.dirname(src))
+PROFILES_FILE_NAME = "study_profiles.json"
+profiles_file = src + PROFILES_FILE_NAME
+MAPPING_CONFIG_FILE_NAME = "ExportResourceMappingConfig.json"
+
+# Generated files, deleted from the output folder before writing new ones
+GENERATED_EXTENSIONS = (".groovy", ".json")
+
+MAPPING_CONFIG_DESCRIPTION = "This configuration links a CentraXX entity (selectFromCxxEntity) to a FHIR resource (exportToFhirResource) by conversion through a transformation template (transformByTemplate). Only the template can be changed. The same entity can be configured to the same FHIR resource by multiple templates. The configuration can be changed during runtime without CentraXX restart. The mapping order is important, if the target system checks referential integrity (e.g. blaze store)."
+
+
+class SheetTemplate:
+    # One groovy script per row of the values sheet, named file_name_root + IdComplement (lower case)
+
+    def __init__(self, template_file, values_file, file_name_root, resource, fields):
+        self.template_file = template_file
+        self.values_file = values_file
+        self.file_name_root = file_name_root
+        self.resource = resource
+        self.fields = fields
+
+
+class IterTemplate:
+    # nb_iterations groovy scripts, ##iter## is replaced by 0 .. nb_iterations - 1
+
+    def __init__(self, template_file, nb_iterations, file_name_root, resource):
+        self.template_file = template_file
+        self.nb_iterations = nb_iterations
+        self.file_name_root = file_name_root
+        self.resource = resource
+
+
+class ConstantScript:
+    # Groovy script of the leaf folder, copied as it is
+
+    def __init__(self, file_name, resource):
+        self.file_name = file_name
+        self.resource = resource
+
+
+class ScriptTemplate:
+    # One groovy script named file_name (case kept), ##field## replaced by the given values, e.g. the scripts of the
+    # projects mapping other CentraXX entities (PATIENT_MASTER, SAMPLE, ...) with their boilerplate in partials
+
+    def __init__(self, template_file, file_name, resource, entity="STUDY_VISIT_ITEM", values=None):
+        self.template_file = template_file
+        self.file_name = file_name
+        self.resource = resource
+        self.entity = entity
+        self.values = values or {}
+
+
+def mapping(template_name, resource, entity="STUDY_VISIT_ITEM"):
+    return {"selectFromCxxEntity": entity, "transformByTemplate": template_name, "exportToFhirResource": resource}
+
+
+def read_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def load_module(path):
+    # main_*.py files only declare what to generate, they are loaded without running them as scripts
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0], path)
+    module = importlib.util.module_from_spec(spec)
+    # They import generator by its name, which is this module for the time of the load (also in the package)
+    previous = sys.modules.get("generator")
+    sys.modules["generator"] = sys.modules[__name__]
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        if previous is None:
+            del sys.modules["generator"]
+        else:
+            sys.modules["generator"] = previous
+    return module
+
+
+def main_file(folder):
+    py_files = sorted(file_name for file_name in os.listdir(folder) if file_name.startswith("main_")
+                      and file_name.endswith(".py"))
+    return os.path.join(folder, py_files[0]) if py_files else None
+
+
+def read_partial_mappings(path):
+    # partial_ExportResourceMappingConfig.txt holds a comma terminated excerpt of the mappings list
+    excerpt = read_file(path).strip().rstrip(",")
+    return json.loads(f"[{excerpt}]") if excerpt else []
+
+
+class Generator:
+    # Parses every template and loads every values sheet once, shared by all rendered study profiles
+
+    def __init__(self, generator_dir=src):
+        self.generator_dir = generator_dir
+        catalog_file = template_cache.cache_path(generator_dir, code_catalog.CATALOG_FILE_NAME)
+        self.catalog = code_catalog.open_catalog(catalog_file, generator_dir)
+        self.cache = template_cache.TemplateCache(generator_dir)
+        self.templates = {}
+        self.sources = {}
+        self.rows = {}
+        # file name roots of the leaves rebuilt completely by collect(targets)
+        self.rebuilt_roots = []
+        # resource id pattern -> scripts of a leaf declaring it shared (shared_resource_ids of the leaf main)
+        self.shared_resource_ids = {}
+
+    def template(self, path, fields):
+        # Template split into literal text and placeholder names: odd positions are the names of the fields
+        key = (path, tuple(fields))
+        if key not in self.templates:
+            text = self.cache.compose(read_file(path))
+            pattern = "|".join(re.escape(f"##{field}##") for field in fields)
+            segments = []
+            position = 0
+            for match in re.finditer(pattern, text) if fields else []:
+                segments.append(text[position:match.start()])
+                segments.append(match.group(0)[2:-2])
+                position = match.end()
+            segments.append(text[position:])
+            self.templates[key] = segments
+            self.sources[id(segments)] = template_cache.content_digest(text)
+        return self.templates[key]
+
+    def source_digest(self, segments):
+        # Digest of the composed template (with its partials), or of the content of a copied file
+        return self.sources.get(id(segments)) or template_cache.content_digest(*segments)
+
+    def sheet_rows(self, values_path):
+        if values_path not in self.rows:
+            self.rows[values_path] = code_catalog.read_rows(self.catalog, values_path)
+        return self.rows[values_path]
+
+    def leaf_outputs(self, leaf_folder, leaf, rows_filter=None):
+        # Yields (script name, template segments, values, mapping) for each script of the leaf, only the sheet rows
+        # with an IdComplement in rows_filter (lower case) if given
+        leaf_src = leaf_folder + "/"
+        for item in leaf.templates:
+            if rows_filter is not None and not isinstance(item, SheetTemplate):
+                continue
+            if isinstance(item, ConstantScript):
+                yield item.file_name, [read_file(leaf_src + item.file_name + ".groovy")], {}, \
+                    mapping(item.file_name, item.resource)
+            elif isinstance(item, ScriptTemplate):
+                segments = self.template(leaf_src + item.template_file, list(item.values))
+                yield item.file_name, segments, item.values, mapping(item.file_name, item.resource, item.entity)
+            elif isinstance(item, IterTemplate):
+                segments = self.template(leaf_src + item.template_file, ["iter"])
+                for i in range(item.nb_iterations):
+                    yield item.file_name_root + str(i), segments, {"iter": str(i)}, \
+                        mapping(item.file_name_root + str(i), item.resource)
+            else:
+                segments = self.template(leaf_src + item.template_file, item.fields)
+                rows = self.sheet_rows(leaf_src + item.values_file)
+                script_names = [item.file_name_root + row["IdComplement"].lower() for row in rows]
+                code_catalog.record_scripts(self.catalog, leaf_src + item.values_file, script_names)
+                for script_name, row in zip(script_names, rows):
+                    if rows_filter is None or row["IdComplement"].lower() in rows_filter:
+                        yield script_name, segments, row, mapping(script_name, item.resource)
+
+    def parse_targets(self, targets):
+        # Targets are form folders (Anamnesis), leaf folders (Anamnesis/Diseases) or IdComplements of sheet rows
+        folders = set()
+        row_ids = set()
+        for target in targets:
+            target = target.replace("\\", "/").strip("/")
+            if os.path.isdir(os.path.join(self.generator_dir, target)):
+                folders.add(target)
+            else:
+                row_ids.add(target.lower())
+        return folders, row_ids
+
+    def collect(self, targets=None):
+        # All outputs of the generator in mapping order: (file name, segments, values) and the mappings,
+        # or only those of the targets
+        folders, row_ids = self.parse_targets(targets) if targets else (set(), set())
+        found = set()
+        outputs = []
+        mappings = []
+        for folder in sorted(os.listdir(self.generator_dir)):
+            section_folder = os.path.join(self.generator_dir, folder)
+            section_main = main_file(section_folder) if os.path.isdir(section_folder) else None
+            if section_main is None:
+                continue
+            section = load_module(section_main)
+            whole_section = not targets or folder in folders
+            found.update({folder} & folders)
+
+            constant_folder = os.path.join(section_folder, "Constant")
+            if whole_section and os.path.isdir(constant_folder):
+                for file_name in sorted(os.listdir(constant_folder)):
+                    if file_name == "partial_ExportResourceMappingConfig.txt":
+                        mappings.extend(read_partial_mappings(os.path.join(constant_folder, file_name)))
+                    elif os.path.isfile(os.path.join(constant_folder, file_name)):
+                        outputs.append((file_name, [read_file(os.path.join(constant_folder, file_name))], {}))
+
+            for leaf_name in section.leaves:
+                leaf_folder = os.path.join(section_folder, leaf_name)
+                whole_leaf = whole_section or f"{folder}/{leaf_name}" in folders
+                if not whole_leaf and not row_ids:
+                    continue
+                found.update({f"{folder}/{leaf_name}"} & folders)
+                leaf = load_module(main_file(leaf_folder))
+                if whole_leaf and targets:
+                    self.rebuilt_roots.extend(item.file_name_root for item in leaf.templates
+                                              if isinstance(item, (SheetTemplate, IterTemplate)))
+                script_names = []
+                for script_name, segments, values, script_mapping in \
+                        self.leaf_outputs(leaf_folder, leaf, None if whole_leaf else row_ids):
+                    outputs.append((script_name + ".groovy", segments, values))
+                    mappings.append(script_mapping)
+                    script_names.append(script_name)
+                    found.update({values.get("IdComplement", "").lower()} & row_ids)
+                for pattern in getattr(leaf, "shared_resource_ids", ()):
+                    self.shared_resource_ids.setdefault(pattern, set()).update(script_names)
+
+        unknown = sorted((folders | row_ids) - found)
+        if unknown:
+            raise ValueError(f"Unknown targets (not a form, leaf or IdComplement): {', '.join(unknown)}")
+        return outputs, mappings
+
+
+class StudyProfile:
+    # Study code, CRF names and ProjectConfig values of one rendered variant of the mappings.
+    # template_study_code is the study code the templates and constant scripts of the project are written for.
+    # versioned outputs are committed, snapshot.py also checks them against the manifest (hand edits are overwritten).
+
+    def __init__(self, name, template_study_code=None, study_code=None, output=".", crf_names=None,
+                 project_config=None, shard_by_crf=False, versioned=False):
+        self.name = name
+        self.template_study_code = template_study_code
+        self.study_code = study_code or template_study_code
+        self.output = output
+        self.crf_names = crf_names or {}
+        self.project_config = project_config or {}
+        self.shard_by_crf = shard_by_crf
+        self.versioned = versioned
+
+        literals = dict(self.crf_names)
+        if template_study_code:
+            literals[template_study_code] = self.study_code
+        self.literals = {f'"{old}"': f'"{new}"' for old, new in literals.items() if old != new}
+        self.pattern = re.compile("|".join(re.escape(old) for old in self.literals)) if self.literals else None
+        self.substituted = {}
+        self.digest = template_cache.content_digest(json.dumps([self.template_study_code, self.study_code,
+                                                                self.literals, self.project_config], sort_keys=True))
+
+    def substitute(self, text):
+        if self.pattern is None:
+            return text
+        return self.pattern.sub(lambda match: self.literals[match.group(0)], text)
+
+    def render(self, segments, values):
+        # Literal parts are adapted to the profile once per template, placeholders once per script
+        key = id(segments)
+        if key not in self.substituted:
+            self.substituted[key] = (segments, [self.substitute(part) for part in segments[0::2]])
+        literal_parts = self.substituted[key][1]
+        rendered = [literal_parts[0]]
+        for field, literal in zip(segments[1::2], literal_parts[1:]):
+            rendered.append(values[field])
+            rendered.append(literal)
+        return "".join(rendered)
+
+    def render_project_config(self, text):
+        if self.study_code == self.template_study_code and not self.project_config:
+            return text
+        config = json.loads(text)
+        prefix = f"{self.template_study_code}$"
+        config["patientFilterValues"]["value"] = [
+            self.study_code + "$" + value[len(prefix):] if value.startswith(prefix) else value
+            for value in config["patientFilterValues"]["value"]]
+        for key, value in self.project_config.items():
+            config[key]["value"] = value
+        return json.dumps(config, indent=2, ensure_ascii=False)
+
+
+def load_profiles(path=profiles_file):
+    with open(path, "r", encoding="utf-8") as f:
+        profiles_config = json.load(f)
+    template_study_code = profiles_config.get("templateStudyCode")
+    return [StudyProfile(profile["name"], template_study_code, profile.get("studyCode"), profile.get("output", "."),
+                         profile.get("crfNames"), profile.get("projectConfig"), profile.get("shardByCrf", False),
+                         profile.get("versioned", False))
+            for profile in profiles_config["profiles"]]
+
+
+def clean_output(output, keep=()):
+    # Delete old generated files in the output folder (not folders, not e.g. the README.md of a project)
+    os.makedirs(output, exist_ok=True)
+    for filename in os.listdir(output):
+        file_path = os.path.join(output, filename)
+        try:
+            if filename.endswith(GENERATED_EXTENSIONS) and filename not in keep and \
+                    (os.path.isfile(file_path) or os.path.islink(file_path)):
+                os.unlink(file_path)
+        except Exception as e:
+            print('Failed to delete %s. Reason: %s' % (file_path, e))
+
+
+def mapping_config_description(path):
+    # The description of an existing mapping config is kept (projects may have their own), the default one otherwise
+    if not os.path.isfile(path):
+        return MAPPING_CONFIG_DESCRIPTION
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("description", MAPPING_CONFIG_DESCRIPTION)
+
+
+def mapping_config_text(mappings, description=MAPPING_CONFIG_DESCRIPTION):
+    return json.dumps({"description": description, "mappings": mappings}, indent=2, ensure_ascii=False)
+
+
+def write_mapping_config(path, mappings, description=MAPPING_CONFIG_DESCRIPTION):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(mapping_config_text(mappings, description))
+
+
+_id_assignment = re.compile(r'^[ \t]*id = ', re.MULTILINE)
+
+
+def resource_id_patterns(script):
+    # Every id = expression of a script as pattern: string literals outside brackets kept, the other parts as {}
+    # ("Observation/BodyTemp-" + context.source[studyVisitItem().crf().id()] -> Observation/BodyTemp-{}).
+    # An expression ends at the end of its line, or of the line closing its brackets.
+    patterns = set()
+    for match in _id_assignment.finditer(script):
+        pattern, depth, position = "", 0, match.end()
+        while position < len(script):
+            character = script[position]
+            if character == "\n" and depth == 0:
+                break
+            if character == '"':
+                end = position + 1
+                while end < len(script) and script[end] != '"':
+                    end += 2 if script[end] == "\\" else 1
+                if depth == 0:
+                    # interpolated values of a GString are not literal
+                    pattern += re.sub(r"\$(\{[^}]*}|\w+)", "{}", script[position + 1:end])
+                position = end + 1
+                continue
+            if character in "([{":
+                depth += 1
+            elif character in ")]}":
+                depth -= 1
+            if (depth > 0 or character not in " \t+)]}") and not pattern.endswith("{}"):
+                pattern += "{}"
+            position += 1
+        patterns.add(pattern)
+    return patterns
+
+
+def check_resource_ids(scripts, shared_resource_ids=None):
+    # Each resource id pattern must be produced by one mapping only, otherwise two mappings overwrite each other's
+    # resources in the target system. scripts: template name -> rendered script. shared_resource_ids: pattern ->
+    # scripts of one leaf allowed to share it (e.g. gated on different laboratory methods of the same finding id)
+    shared_resource_ids = shared_resource_ids or {}
+    producers = {}
+    for template_name, script in sorted(scripts.items()):
+        for pattern in resource_id_patterns(script):
+            producers.setdefault(pattern, []).append(template_name)
+    collisions = [f"  {pattern}: {', '.join(names)}" for pattern, names in sorted(producers.items())
+                  if len(names) > 1 and not set(names) <= shared_resource_ids.get(pattern, set())]
+    if collisions:
+        raise ValueError("Resource ids produced by more than one mapping:\n" + "\n".join(collisions))
+
+
+def rendered_scripts(profile, outputs):
+    return {file_name[:-len(".groovy")]: profile.render(segments, values)
+            for file_name, segments, values in outputs if file_name.endswith(".groovy")}
+
+
+def print_optimizations(optimizations):
+    for file_name, stats in sorted(optimizations.items()):
+        if any(stats.values()):
+            print(f"  {file_name}: {stats['saved']} context.source accesses saved, {stats['folded']} conditions folded, "
+                  f"{stats['removed']} branches removed, {stats['unwrapped']} branches unwrapped")
+    totals = {key: sum(stats[key] for stats in optimizations.values()) for key in ("saved", "removed", "unwrapped")}
+    print(f"  Optimized {len(optimizations)} scripts: {totals['saved']} context.source accesses saved, "
+          f"{totals['removed'] + totals['unwrapped']} branches settled at generation time")
+
+
+def output_digest(generator, profile, segments, values, optimize):
+    # Digest of everything an output is rendered from: template with partials (or copied file), sheet row and profile
+    return template_cache.content_digest(generator.source_digest(segments), profile.digest,
+                                         json.dumps(values, sort_keys=True), str(optimize))
+
+
+def render_output(profile, file_name, segments, values, optimize, shard=None):
+    # Content of one output file and the statistics of the optimizer (None if not optimized)
+    content = profile.render(segments, values)
+    if file_name == "ProjectConfig.json":
+        content = profile.render_project_config(content)
+        if shard:
+            content = crf_shards.shard_project_config(content, shard)
+    if optimize and file_name.endswith(".groovy"):
+        return groovy_optimizer.optimize(content)
+    return content, None
+
+
+def write_files(generator, profile, output, outputs, optimize, known, shard=None):
+    # Renders the outputs not written from the same sources yet, returns the digests of all outputs
+    digests = {}
+    optimizations = {}
+    nb_written = 0
+    for file_name, segments, values in outputs:
+        digest = output_digest(generator, profile, segments, values, optimize)
+        digests[file_name] = digest
+        if generator.cache.is_current(output, file_name, digest, known):
+            continue
+        content, stats = render_output(profile, file_name, segments, values, optimize, shard)
+        if stats is not None:
+            optimizations[file_name] = stats
+        with open(os.path.join(output, file_name), "w", encoding="utf-8") as f:
+            f.write(content)
+        nb_written += 1
+    print(f"{profile.name}: {nb_written} of {len(outputs)} files written to {os.path.relpath(output)}")
+    if optimizations:
+        print_optimizations(optimizations)
+    return digests
+
+
+def write_project(generator, profile, output, outputs, mappings, optimize, shard=None):
+    # Writes one export project (scripts, configs and ExportResourceMappingConfig.json) into output
+    if shard is None:
+        check_resource_ids(rendered_scripts(profile, outputs), generator.shared_resource_ids)
+    known = generator.cache.outputs(output)
+    mapping_config = os.path.join(output, MAPPING_CONFIG_FILE_NAME)
+    description = mapping_config_description(mapping_config)
+    clean_output(output, keep=known.keys() & {file_name for file_name, _, _ in outputs})
+    digests = write_files(generator, profile, output, outputs, optimize, known, shard)
+    write_mapping_config(mapping_config, mappings, description)
+    generator.cache.record_outputs(output, digests)
+
+
+def patch_mapping_config(path, mappings, rebuilt_roots):
+    # Replaces the mappings of the rendered scripts in an existing mapping config, new ones are inserted after the
+    # preceding rendered mapping. Mappings of completely rebuilt leaves without script anymore are removed.
+    with open(path, "r", encoding="utf-8") as f:
+        mapping_config = json.load(f)
+    existing = mapping_config["mappings"]
+    rendered = {m["transformByTemplate"] for m in mappings}
+    removed = [m["transformByTemplate"] for m in existing if m["transformByTemplate"] not in rendered
+               and m["transformByTemplate"].startswith(tuple(rebuilt_roots))]
+    patched = [m for m in existing if m["transformByTemplate"] not in removed]
+    position = None
+    for new_mapping in mappings:
+        if position is None:
+            # Next to the mappings of the same leaf (conditionLungDiseases_...), at the end otherwise
+            root = new_mapping["transformByTemplate"].split("_")[0] + "_"
+            siblings = [i for i, m in enumerate(patched) if m["transformByTemplate"].startswith(root)]
+            position = siblings[-1] + 1 if siblings else len(patched)
+        index = next((i for i, m in enumerate(patched)
+                      if m["transformByTemplate"] == new_mapping["transformByTemplate"]), None)
+        if index is None:
+            patched.insert(position, new_mapping)
+        else:
+            patched[index] = new_mapping
+            position = index
+        position += 1
+    write_mapping_config(path, patched, mapping_config.get("description", MAPPING_CONFIG_DESCRIPTION))
+    return removed
+
+
+def write_targets(generator, profile, output, outputs, mappings, optimize):
+    # Writes only the rendered targets and patches their mappings into the existing project
+    mapping_config = os.path.join(output, MAPPING_CONFIG_FILE_NAME)
+    if not os.path.isfile(mapping_config):
+        raise ValueError(f"{mapping_config} not found, build the whole profile {profile.name} first")
+    # The rendered targets together with the other scripts of the project
+    with open(mapping_config, "r", encoding="utf-8") as f:
+        template_names = [m["transformByTemplate"] for m in json.load(f)["mappings"]]
+    scripts = {name: read_file(os.path.join(output, name + ".groovy")) for name in template_names
+               if os.path.isfile(os.path.join(output, name + ".groovy"))}
+    scripts.update(rendered_scripts(profile, outputs))
+    check_resource_ids(scripts, generator.shared_resource_ids)
+    known = generator.cache.outputs(output)
+    digests = write_files(generator, profile, output, outputs, optimize, known)
+    removed = patch_mapping_config(mapping_config, mappings, generator.rebuilt_roots)
+    for template_name in removed:
+        file_path = os.path.join(output, template_name + ".groovy")
+        if os.path.isfile(file_path):
+            os.unlink(file_path)
+    generator.cache.update_outputs(output, digests, [template_name + ".groovy" for template_name in removed])
+    if removed:
+        print(f"  Removed {', '.join(removed)}")
+
+
+def write_shards(generator, profile, output, outputs, mappings, optimize):
+    # One export project per CRF in the sub folders of output, the output folder itself only keeps the sub folders
+    scripts = rendered_scripts(profile, outputs)
+    check_resource_ids(scripts, generator.shared_resource_ids)
+    clean_output(output)
+    generator.cache.record_outputs(output, {})
+    for shard, (shard_mappings, nb_dependencies) in crf_shards.shard_mappings(mappings, scripts).items():
+        names = {m["transformByTemplate"] + ".groovy" for m in shard_mappings}
+        shard_outputs = [o for o in outputs if o[0] in names or not o[0].endswith(".groovy")]
+        write_project(generator, profile, os.path.join(output, shard), shard_outputs, shard_mappings, optimize, shard)
+        print(f"  {shard}: {len(shard_mappings)} mappings ({nb_dependencies} added for referential integrity)")
+
+
+def sheet_display_columns(generator_dir=src):
+    # Values sheet (relative to the generator folder) -> code system -> columns shown by the codings of its templates
+    display_columns = {}
+    for folder in sorted(os.listdir(generator_dir)):
+        section_folder = os.path.join(generator_dir, folder)
+        section_main = main_file(section_folder) if os.path.isdir(section_folder) else None
+        if section_main is None:
+            continue
+        for leaf_name in load_module(section_main).leaves:
+            leaf_folder = os.path.join(section_folder, leaf_name)
+            for item in load_module(main_file(leaf_folder)).templates:
+                if not isinstance(item, SheetTemplate):
+                    continue
+                columns = display_columns.setdefault(f"{folder}/{leaf_name}/{item.values_file}", {})
+                template = read_file(os.path.join(leaf_folder, item.template_file))
+                for system, template_columns in terminology.template_display_columns(template).items():
+                    known = columns.setdefault(system, [])
+                    known.extend([column for column in template_columns if column not in known])
+    return display_columns
+
+
+def check_terminology(generator):
+    # Codes and displays of the values sheets against the local terminology indexes, if built (see terminology.py)
+    indexes = terminology.open_indexes(generator.generator_dir)
+    if not indexes:
+        return
+    problems = terminology.check_catalog(generator.catalog, indexes, sheet_display_columns(generator.generator_dir))
+    if problems:
+        print(f"Terminology: {len(problems)} problems in the codes and displays of the values sheets "
+              f"({', '.join(sorted(indexes))})")
+        terminology.print_problems(problems)
+
+
+def build(profiles=None, project=project_dir, optimize=False, targets=None):
+    # Renders all study profiles of a project (folder holding the GroovyGenerator) in one pass over the parsed
+    # templates and loaded sheets. The output folders of the profiles are relative to the project.
+    # Files whose template, partials, sheet row and profile did not change since the last build are not written again.
+    # optimize runs groovy_optimizer.py over the rendered groovy scripts.
+    # targets (forms, leaves or IdComplements) renders only these scripts and patches them into the existing projects.
+    generator_dir = os.path.join(project, "GroovyGenerator")
+    if profiles is None:
+        profiles = load_profiles(os.path.join(generator_dir, PROFILES_FILE_NAME))
+    generator = Generator(generator_dir)
+    code_catalog.build_catalog(generator.catalog, verbose=not targets)
+    check_terminology(generator)
+    outputs, mappings = generator.collect(targets)
+
+    for profile in profiles:
+        output = os.path.abspath(os.path.join(project, profile.output))
+        if targets and profile.shard_by_crf:
+            raise ValueError(f"Profile {profile.name} is sharded by CRF, targets can only be built without shards")
+        if targets:
+            write_targets(generator, profile, output, outputs, mappings, optimize)
+        elif profile.shard_by_crf:
+            write_shards(generator, profile, output, outputs, mappings, optimize)
+        else:
+            write_project(generator, profile, output, outputs, mappings, optimize)
+    return len(outputs) * len(profiles)
@@ -0,0 +1,438 @@
+import re
+
+# Optional pass over rendered groovy scripts (main.py --optimize):
+# - conditions comparing constants of the script (final def iter = 0, final def ICDcode = "") with literals are folded,
+#   branches that cannot run are removed and branches that always run are unwrapped
+# - context.source[...] lookups repeated in a script are read once into a local variable, declared in the innermost
+#   block holding all the lookups, right before the first one
+# The pass only works on the layout of the templates (one statement per line, braces on the line of their statement),
+# statements it does not recognize are left as they are.
+
+_constant_pattern = re.compile(r'^[ \t]*final def (\w+) = (-?\d+|"[^"\\$\n]*")[ \t]*$', re.M)
+_if_pattern = re.compile(r"\bif\s*\(")
+_source_pattern = re.compile(r"context\.source\[(\w+\(\)(?:\.\w+\(\))*)\]")
+_closure_pattern = re.compile(r"^\w+\s*\{", re.M)
+_declaration_pattern = re.compile(r"^\s*(?:final\s+)?(?:def|[A-Z]\w*(?:\[\])?)\s+\w+\s*=", re.M)
+_continuation_starts = ("}", ".", "?", ":", "&&", "||", "+", ")")
+_continuation_ends = ("(", ",", "=", "&&", "||", "+", "?", ":", "[")
+
+
+def code_mask(text):
+    # 1 for each character of code, 0 in strings and comments
+    mask = bytearray(b"\1") * len(text)
+    i = 0
+    n = len(text)
+    while i < n:
+        if text.startswith("//", i):
+            end = text.find("\n", i)
+            end = n if end < 0 else end
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            end = n if end < 0 else end + 2
+        elif text.startswith('"""', i) or text.startswith("'''", i):
+            end = text.find(text[i:i + 3], i + 3)
+            end = n if end < 0 else end + 3
+        elif text[i] in "\"'":
+            j = i + 1
+            while j < n and text[j] not in (text[i], "\n"):
+                j += 2 if text[j] == "\\" else 1
+            end = min(j + 1, n)
+        else:
+            i += 1
+            continue
+        mask[i:end] = bytes(end - i)
+        i = end
+    return mask
+
+
+def matching(text, mask, position):
+    # Position of the bracket closing the one at position, None if unbalanced
+    opening = text[position]
+    closing = {"(": ")", "{": "}", "[": "]"}[opening]
+    depth = 0
+    for i in range(position, len(text)):
+        if not mask[i]:
+            continue
+        if text[i] == opening:
+            depth += 1
+        elif text[i] == closing:
+            depth -= 1
+            if depth == 0:
+                return i
+    return None
+
+
+def line_start(text, position):
+    return text.rfind("\n", 0, position) + 1
+
+
+def line_indent(text, position):
+    start = line_start(text, position)
+    return text[start:start + len(text[start:]) - len(text[start:].lstrip(" \t"))]
+
+
+# Conditions
+
+def tokenize(condition, mask):
+    # Top level tokens of a condition: "(", ")", "!", "&&", "||" and atoms (everything else, e.g. a == "b")
+    tokens = []
+    atom_start = None
+    i = 0
+    while i < len(condition):
+        c = condition[i]
+        if not mask[i]:
+            atom_start = i if atom_start is None else atom_start
+            i += 1
+            continue
+        operator = condition[i:i + 2] if condition[i:i + 2] in ("&&", "||") else \
+            "!" if c == "!" and condition[i + 1:i + 2] != "=" else None
+        before = condition[atom_start:i].rstrip() if atom_start is not None else ""
+        if operator or (c == "(" and not (before and (before[-1].isalnum() or before[-1] in "_])?."))) or c == ")":
+            if atom_start is not None and condition[atom_start:i].strip():
+                tokens.append(("atom", atom_start, i))
+            atom_start = None
+            token = operator or c
+            tokens.append((token, i, i + len(token)))
+            i += len(token)
+        elif c in "([":
+            end = matching(condition, mask, i)
+            if end is None:
+                return None
+            atom_start = i if atom_start is None else atom_start
+            i = end + 1
+        else:
+            if atom_start is None and not c.isspace():
+                atom_start = i
+            i += 1
+    if atom_start is not None and condition[atom_start:].strip():
+        tokens.append(("atom", atom_start, len(condition)))
+    return tokens
+
+
+class ConditionFolder:
+    # Recursive descent over the tokens, each node is folded to (value, text): value is True/False when the
+    # expression is constant, text is the (possibly simplified) expression otherwise
+
+    def __init__(self, condition, tokens, constants):
+        self.condition = condition
+        self.tokens = tokens
+        self.constants = constants
+        self.position = 0
+        self.changed = False
+
+    def peek(self):
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def take(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def fold(self):
+        # The text is only used if a comparison was folded, operators are then rewritten with single spaces
+        value, text = self.parse_or()
+        if self.position != len(self.tokens):
+            raise ValueError("unexpected token")
+        return value, text
+
+    def parse_binary(self, operator, parse_operand, absorbing):
+        operands = [parse_operand()]
+        while self.peek() == operator:
+            self.take()
+            operands.append(parse_operand())
+        if len(operands) == 1:
+            return operands[0]
+        if any(value is absorbing for value, _ in operands):
+            return absorbing, None
+        remaining = [text for value, text in operands if value is None]
+        if not remaining:
+            return not absorbing, None
+        return None, f" {operator} ".join(remaining)
+
+    def parse_or(self):
+        return self.parse_binary("||", self.parse_and, True)
+
+    def parse_and(self):
+        return self.parse_binary("&&", self.parse_unary, False)
+
+    def parse_unary(self):
+        token, start, end = self.take()
+        if token == "!":
+            value, text = self.parse_unary()
+            return (not value, None) if value is not None else (None, "!" + text)
+        if token == "(":
+            value, text = self.parse_or()
+            if self.take()[0] != ")":
+                raise ValueError("unbalanced parenthesis")
+            return (value, None) if value is not None else (None, f"({text})")
+        if token != "atom":
+            raise ValueError("unexpected token")
+        atom = self.condition[start:end].strip()
+        value = self.fold_comparison(atom)
+        if value is not None:
+            self.changed = True
+        return value, atom
+
+    def literal(self, operand):
+        operand = self.constants.get(operand, operand)
+        if re.fullmatch(r"-?\d+", operand):
+            return int(operand)
+        if re.fullmatch(r'"[^"\\$\n]*"', operand):
+            return operand[1:-1]
+        return None
+
+    def fold_comparison(self, atom):
+        if atom in ("true", "false"):
+            return atom == "true"
+        parts = re.split(r"(==|!=)", atom)
+        if len(parts) != 3 or any(operator in atom for operator in ("<", ">", "?", "=~")):
+            return None
+        left, right = self.literal(parts[0].strip()), self.literal(parts[2].strip())
+        if left is None or right is None or type(left) is not type(right):
+            return None
+        return (left == right) == (parts[1] == "==")
+
+
+def fold_condition(condition, mask, constants):
+    tokens = tokenize(condition, mask)
+    if not tokens:
+        return None, condition, False
+    folder = ConditionFolder(condition, tokens, constants)
+    try:
+        value, text = folder.fold()
+    except (ValueError, IndexError):
+        return None, condition, False
+    return value, text, folder.changed
+
+
+# Branches
+
+def parse_if(text, mask, if_position):
+    # Spans of an if statement with its else if / else chain: [(condition start, condition end, body open, body close)]
+    # and the position after the chain, None for ifs without braces
+    branches = []
+    position = if_position
+    while True:
+        open_paren = text.index("(", position)
+        close_paren = matching(text, mask, open_paren)
+        if close_paren is None:
+            return None
+        body_open = close_paren + 1
+        while body_open < len(text) and text[body_open] in " \t":
+            body_open += 1
+        if body_open >= len(text) or text[body_open] != "{":
+            return None
+        body_close = matching(text, mask, body_open)
+        if body_close is None:
+            return None
+        branches.append((open_paren + 1, close_paren, body_open, body_close))
+        following = re.compile(r"[ \t]*else[ \t]*(if[ \t]*\(|\{)").match(text, body_close + 1)
+        if following is None:
+            return branches, None, body_close + 1
+        if following.group(1) == "{":
+            else_open = following.end() - 1
+            else_close = matching(text, mask, else_open)
+            if else_close is None:
+                return None
+            return branches, (else_open, else_close), else_close + 1
+        position = following.start(1)
+
+
+def in_string(text, mask, position):
+    # True if position is inside a string literal (e.g. a line of a multi-line string), not in code or a comment
+    if mask[position]:
+        return False
+    start = position
+    while start > 0 and not mask[start - 1]:
+        start -= 1
+    return not text.startswith(("//", "/*"), start)
+
+
+def unwrapped(text, mask, body_open, body_close, indent):
+    # Body of a block at the indentation of the block statement. All lines are shifted by the same amount, so comments
+    # keep their indentation relative to the code, lines inside multi-line strings are kept as they are.
+    body_start = body_open + 1
+    while body_start < body_close and text[body_start] == "\n":
+        body_start += 1
+    body = text[body_start:body_close].rstrip()
+    if _declaration_pattern.search(body):
+        return None
+    if not body:
+        return ""
+    lines = []
+    for line in body.split("\n"):
+        lines.append((line, in_string(text, mask, body_start)))
+        body_start += len(line) + 1
+    indents = [len(line) - len(line.lstrip(" \t")) for line, verbatim in lines if line.strip() and not verbatim]
+    shift = min([indents[0] - len(indent)] + indents)
+    if shift <= 0:
+        return body + "\n"
+    return "\n".join(line if verbatim else line[min(shift, len(line)):] for line, verbatim in lines) + "\n"
+
+
+def remove_lines(text, start, end):
+    # Extends [start, end) to whole lines when nothing else is on them
+    line_begin = line_start(text, start)
+    line_end = text.find("\n", end)
+    line_end = len(text) if line_end < 0 else line_end
+    if not text[line_begin:start].strip() and not text[end:line_end].strip():
+        return line_begin, min(line_end + 1, len(text))
+    return start, end
+
+
+def fold_branch(text, mask, if_position, constants):
+    # Rewritten text if one condition of the if chain could be folded, None otherwise
+    parsed = parse_if(text, mask, if_position)
+    if parsed is None:
+        return None
+    branches, else_block, chain_end = parsed
+    indent = line_indent(text, if_position)
+    for index, (condition_start, condition_end, body_open, body_close) in enumerate(branches):
+        condition_mask = mask[condition_start:condition_end]
+        value, folded, changed = fold_condition(text[condition_start:condition_end], condition_mask, constants)
+        if not changed:
+            continue
+        keyword = text.rfind("if", 0, condition_start)
+        if value is None:
+            return text[:condition_start] + folded + text[condition_end:], "folded"
+        if value and index == 0:
+            body = unwrapped(text, mask, body_open, body_close, indent)
+            if body is None:
+                return None
+            start, end = remove_lines(text, if_position, chain_end)
+            return text[:start] + body + text[end:], "unwrapped"
+        if value:
+            # else if (true) {...} ... -> else {...}
+            return text[:keyword] + text[body_open:body_close + 1] + text[chain_end:], "unwrapped"
+        if index == 0 and len(branches) > 1:
+            next_keyword = text.index("if", body_close)
+            return text[:if_position] + text[next_keyword:], "removed"
+        if index == 0 and else_block:
+            body = unwrapped(text, mask, else_block[0], else_block[1], indent)
+            if body is None:
+                return None
+            start, end = remove_lines(text, if_position, chain_end)
+            return text[:start] + body + text[end:], "removed"
+        if index == 0:
+            start, end = remove_lines(text, if_position, body_close + 1)
+            return text[:start] + text[end:], "removed"
+        # } else if (false) {...} -> }
+        else_keyword = text.rfind("else", 0, keyword)
+        return text[:text.rfind("}", 0, else_keyword) + 1] + text[body_close + 1:], "removed"
+    return None
+
+
+def script_constants(text):
+    # Constants assigned once in the whole script (a name declared in several closures is not a constant)
+    return {name: value for name, value in _constant_pattern.findall(text)
+            if len(re.findall(rf"\b{name}\s*=(?!=)", text)) == 1}
+
+
+def fold_branches(text, stats):
+    constants = script_constants(text)
+    if not constants:
+        return text
+    position = 0
+    while True:
+        mask = code_mask(text)
+        # else if branches are folded with the if they belong to
+        match = next((m for m in _if_pattern.finditer(text, position)
+                      if mask[m.start()] and not text[:m.start()].rstrip().endswith("else")), None)
+        if match is None:
+            return text
+        result = fold_branch(text, mask, match.start(), constants)
+        if result is None:
+            position = match.end()
+            continue
+        text, kind = result
+        stats[kind] += 1
+        position = line_start(text, match.start())
+
+
+# Lookups
+
+def brace_pairs(text, mask):
+    pairs = []
+    stack = []
+    for i, c in enumerate(text):
+        if mask[i] and c == "{":
+            stack.append(i)
+        elif mask[i] and c == "}" and stack:
+            pairs.append((stack.pop(), i))
+    return pairs
+
+
+def enclosing(pairs, position):
+    return sorted(pair for pair in pairs if pair[0] < position < pair[1])
+
+
+def local_name(text, path):
+    methods = re.findall(r"(\w+)\(\)", path)[1:] or re.findall(r"(\w+)\(\)", path)
+    name = "source" + "".join(method[0].upper() + method[1:] for method in methods)
+    candidate = name
+    number = 2
+    while re.search(rf"\b{candidate}\b", text):
+        candidate = f"{name}{number}"
+        number += 1
+    return candidate
+
+
+def is_statement_start(text, line_begin):
+    line = text[line_begin:text.find("\n", line_begin)].strip()
+    if not line or line.startswith(_continuation_starts):
+        return False
+    previous = text[:line_begin].rstrip()
+    previous_line = previous[previous.rfind("\n") + 1:].split("//")[0].rstrip()
+    return not previous_line.endswith(_continuation_ends)
+
+
+def is_conditional(text, mask, start, end):
+    # True if code between start and end evaluates what follows only on some paths (&&, ||, ?:, ?.)
+    code = "".join(char if mask[position] else " " for position, char in enumerate(text[start:end], start))
+    return any(operator in code for operator in ("&&", "||", "?"))
+
+
+def hoist_lookups(text, stats):
+    mask = code_mask(text)
+    pairs = brace_pairs(text, mask)
+    edits = []
+    for closure in _closure_pattern.finditer(text):
+        closure_open = closure.end() - 1
+        closure_close = matching(text, mask, closure_open)
+        if closure_close is None or not mask[closure_open]:
+            continue
+        lookups = {}
+        for match in _source_pattern.finditer(text, closure_open, closure_close):
+            if mask[match.start()]:
+                lookups.setdefault(match.group(1), []).append(match)
+        for path, matches in lookups.items():
+            if len(matches) < 2:
+                continue
+            stacks = [enclosing(pairs, match.start()) for match in matches]
+            common = 0
+            while all(len(stack) > common and stack[common] == stacks[0][common] for stack in stacks):
+                common += 1
+            # Only cached if the first lookup already runs on every path through the block holding all lookups: it is
+            # not in a nested block and not behind a short-circuit operator of its statement
+            if len(stacks[0]) > common:
+                continue
+            anchor_line = line_start(text, matches[0].start())
+            if not is_statement_start(text, anchor_line) or is_conditional(text, mask, anchor_line, matches[0].start()):
+                continue
+            name = local_name(text + "".join(edit[2] for edit in edits), path)
+            declaration = f"{line_indent(text, anchor_line)}final def {name} = context.source[{path}]\n"
+            edits.append((anchor_line, anchor_line, declaration))
+            edits.extend((match.start(), match.end(), name) for match in matches)
+            stats["saved"] += len(matches) - 1
+
+    for start, end, replacement in sorted(edits, key=lambda edit: (edit[0], edit[1] > edit[0]), reverse=True):
+        text = text[:start] + replacement + text[end:]
+    return text
+
+
+def optimize(text):
+    # Optimized script and what was done: folded conditions, removed and unwrapped branches, saved source lookups
+    stats = {"folded": 0, "removed": 0, "unwrapped": 0, "saved": 0}
+    text = fold_branches(text, stats)
+    text = hoist_lookups(text, stats)
+    return text, stats
@@ -0,0 +1,155 @@
+import argparse
+import difflib
+import json
+import os
+import sys
+import time
+
+import code_catalog
+import generator
+import template_cache
+
+# Snapshot of the generated tree: the digest of the content of every file each study profile generates (scripts,
+# Constant files, ProjectConfig.json and ExportResourceMappingConfig.json), without optimizer and shards.
+# The manifest is versioned, a change of a template, partial or sheet that alters generated scripts fails the check
+# until the manifest is updated on purpose. Files are rendered in memory, files whose sources did not change since the
+# last check are not rendered again (template_cache.sqlite).
+# The generated files of versioned profiles are committed too, they are checked against the manifest as well, so that a
+# hand edit of a generated file (overwritten by the next build) fails the check.
+MANIFEST_FILE_NAME = "snapshot_manifest.json"
+MANIFEST_DESCRIPTION = "Digest of each file generated by main.py per study profile, checked by snapshot.py. " \
+                       "Update with: python GroovyGenerator/snapshot.py update [--project folder holding the GroovyGenerator]"
+
+
+def render_snapshot(gen, profiles):
+    # Profile name -> file name -> content digest, and the contents rendered in this run (content digest -> content)
+    outputs, mappings = gen.collect()
+    project = os.path.dirname(gen.generator_dir)
+    known = gen.cache.rendered_digests()
+    rendered = {}
+    contents = {}
+    snapshot = {}
+    for profile in profiles:
+        files = {}
+        for file_name, segments, values in outputs:
+            source = generator.output_digest(gen, profile, segments, values, False)
+            if source not in known:
+                content, _ = generator.render_output(profile, file_name, segments, values, False)
+                known[source] = rendered[source] = template_cache.content_digest(content)
+                contents[known[source]] = content
+            files[file_name] = known[source]
+        description = generator.mapping_config_description(
+            os.path.join(project, profile.output, generator.MAPPING_CONFIG_FILE_NAME))
+        content = generator.mapping_config_text(mappings, description)
+        files[generator.MAPPING_CONFIG_FILE_NAME] = template_cache.content_digest(content)
+        contents[files[generator.MAPPING_CONFIG_FILE_NAME]] = content
+        snapshot[profile.name] = files
+    gen.cache.record_rendered(rendered, contents)
+    return snapshot
+
+
+def read_manifest(path):
+    if not os.path.isfile(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["profiles"]
+
+
+def write_manifest(path, snapshot):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"description": MANIFEST_DESCRIPTION, "profiles": snapshot}, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def compare(manifest, snapshot):
+    # (profile, file name, digest in the manifest, rendered digest) of each difference, None for a missing file
+    differences = []
+    for profile in sorted(manifest.keys() | snapshot.keys()):
+        expected = manifest.get(profile, {})
+        actual = snapshot.get(profile, {})
+        for file_name in sorted(expected.keys() | actual.keys()):
+            if expected.get(file_name) != actual.get(file_name):
+                differences.append((profile, file_name, expected.get(file_name), actual.get(file_name)))
+    return differences
+
+
+def compare_outputs(gen, profiles, manifest):
+    # (profile, file name) of the committed files of versioned profiles that differ from the manifest
+    edited = []
+    for profile in profiles:
+        if not profile.versioned:
+            continue
+        output = os.path.join(os.path.dirname(gen.generator_dir), profile.output)
+        for file_name, digest in sorted(manifest.get(profile.name, {}).items()):
+            file_path = os.path.join(output, file_name)
+            if not os.path.isfile(file_path) or template_cache.content_digest(generator.read_file(file_path)) != digest:
+                edited.append((profile.name, file_name))
+    return edited
+
+
+def previous_content(gen, digest, output_file):
+    # Content of the manifest version: from the cache, or the last generated file if it is still this version
+    content = gen.cache.content(digest)
+    if content is None and os.path.isfile(output_file):
+        with open(output_file, "r", encoding="utf-8") as f:
+            content = f.read()
+        if template_cache.content_digest(content) != digest:
+            return None
+    return content
+
+
+def print_differences(gen, profiles, differences, show_diff):
+    outputs = {profile.name: os.path.join(os.path.dirname(gen.generator_dir), profile.output) for profile in profiles}
+    for profile, file_name, expected, actual in differences:
+        if expected is None:
+            print(f"{profile}: {file_name} added")
+        elif actual is None:
+            print(f"{profile}: {file_name} removed")
+        else:
+            print(f"{profile}: {file_name} changed")
+            if not show_diff:
+                continue
+            before = previous_content(gen, expected, os.path.join(outputs.get(profile, ""), file_name))
+            if before is None:
+                print(f"  (content of {expected} not available, generate the manifest version once to see the diff)")
+                continue
+            after = gen.cache.content(actual)
+            sys.stdout.writelines(difflib.unified_diff(before.splitlines(True), after.splitlines(True),
+                                                       f"{file_name} (manifest)", f"{file_name} (generated)"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the generated files of all study profiles against the "
+                                                 "snapshot manifest, or update the manifest.")
+    parser.add_argument("command", nargs="?", choices=["check", "update"], default="check")
+    parser.add_argument("--project", default=generator.project_dir,
+                        help="folder holding the GroovyGenerator (default: %(default)s)")
+    parser.add_argument("--profiles", help="json file with the study profiles to render "
+                                           "(default: study_profiles.json of the GroovyGenerator)")
+    parser.add_argument("--no-diff", action="store_true", help="only list the changed files")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    generator_dir = os.path.join(os.path.abspath(args.project), "GroovyGenerator")
+    manifest_file = os.path.join(generator_dir, MANIFEST_FILE_NAME)
+    profiles = generator.load_profiles(args.profiles or os.path.join(generator_dir, generator.PROFILES_FILE_NAME))
+    gen = generator.Generator(generator_dir)
+    code_catalog.build_catalog(gen.catalog, verbose=False)
+    snapshot = render_snapshot(gen, profiles)
+    manifest = read_manifest(manifest_file)
+    differences = compare(manifest, snapshot)
+    nb_files = sum(len(files) for files in snapshot.values())
+
+    if args.command == "update":
+        write_manifest(manifest_file, snapshot)
+        gen.cache.forget_contents({digest for files in snapshot.values() for digest in files.values()})
+        print(f"{len(differences)} of {nb_files} files changed, {MANIFEST_FILE_NAME} updated")
+    else:
+        print_differences(gen, profiles, differences, not args.no_diff)
+        edited = compare_outputs(gen, profiles, manifest)
+        for profile_name, file_name in edited:
+            print(f"{profile_name}: {file_name} in the output differs from the manifest, edit the template instead "
+                  f"and rebuild")
+        print(f"{len(differences)} of {nb_files} files differ from {MANIFEST_FILE_NAME} "
+              f"({time.perf_counter() - started:.2f}s)")
+        sys.exit(1 if differences or edited else 0)
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import zlib
+
+# Shared template fragments, included by the templates of all form folders with
+#   ##include:name##   or   ##include:name(parameter=value, parameter=value)##
+# on a line of its own. The lines of the partial are indented like the include line, ##parameter## in the partial is
+# replaced by the value given in the include (values may be fields of the template, e.g. code=##ParameterCodeDisease##).
+# A partial is looked up in the Partials folder of the project, then in the SharedPartials folder of this generator,
+# which holds the fragments common to several projects (a project partial of the same name takes precedence)
+PARTIALS_FOLDER_NAME = "Partials"
+SHARED_PARTIALS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "SharedPartials")
+CACHE_FILE_NAME = "template_cache.sqlite"
+# Folder holding the sqlite caches of all generator folders instead of the generator folders, e.g. a temporary folder
+CACHE_DIR_VARIABLE = "GROOVY_GENERATOR_CACHE_DIR"
+
+_include_pattern = re.compile(r"^([ \t]*)##include:([\w-]+)(?:\((.*?)\))?##[ \t]*$", re.M)
+_parameter_pattern = re.compile(r"##([\w-]+)##")
+
+
+def content_digest(*parts):
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def cache_path(generator_dir, file_name):
+    # Path of a cache file of the generator folder, in a sub folder per generator folder of $GROOVY_GENERATOR_CACHE_DIR
+    cache_dir = os.environ.get(CACHE_DIR_VARIABLE)
+    if not cache_dir:
+        return os.path.join(generator_dir, file_name)
+    folder = os.path.join(cache_dir, content_digest(os.path.abspath(generator_dir)))
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, file_name)
+
+
+def parse_parameters(text):
+    parameters = {}
+    for part in text.split(",") if text else []:
+        name, _, value = part.partition("=")
+        parameters[name.strip()] = value.strip()
+    return parameters
+
+
+def compile_text(text):
+    # Literal text at even positions, include directives [indent, partial name, parameters] at odd positions
+    structure = []
+    position = 0
+    for match in _include_pattern.finditer(text):
+        structure.append(text[position:match.start()])
+        structure.append([match.group(1), match.group(2), parse_parameters(match.group(3))])
+        position = match.end()
+    structure.append(text[position:])
+    return structure
+
+
+def substitute_parameters(text, parameters):
+    if not parameters:
+        return text
+    return _parameter_pattern.sub(lambda match: parameters.get(match.group(1), match.group(0)), text)
+
+
+def indent(text, prefix):
+    if not prefix:
+        return text
+    return "".join(prefix + line if line.strip() else line for line in text.splitlines(True))
+
+
+class TemplateCache:
+    # Compiled templates and partials (keyed by the digest of their content) and the digests of the generated files,
+    # so that only the files depending on a changed template, partial or sheet row are written again
+
+    def __init__(self, generator_dir):
+        self.partials_dirs = [os.path.join(generator_dir, PARTIALS_FOLDER_NAME), SHARED_PARTIALS_DIR]
+        self.db = sqlite3.connect(cache_path(generator_dir, CACHE_FILE_NAME))
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS compiled (digest TEXT PRIMARY KEY, structure TEXT NOT NULL) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS output (folder TEXT NOT NULL, file_name TEXT NOT NULL, digest TEXT NOT NULL,
+                                               mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL,
+                                               PRIMARY KEY (folder, file_name)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS rendered (source TEXT PRIMARY KEY, digest TEXT NOT NULL) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS blob (digest TEXT PRIMARY KEY, content BLOB NOT NULL) WITHOUT ROWID;
+        """)
+        self.partials = {}
+
+    def compiled(self, text):
+        key = content_digest(text)
+        found = self.db.execute("SELECT structure FROM compiled WHERE digest = ?", (key,)).fetchone()
+        if found:
+            return json.loads(found[0])
+        structure = compile_text(text)
+        self.db.execute("INSERT INTO compiled (digest, structure) VALUES (?, ?)", (key, json.dumps(structure)))
+        return structure
+
+    def partial(self, name):
+        # Each partial is read and compiled once per run
+        if name not in self.partials:
+            paths = [os.path.join(partials_dir, name) for partials_dir in self.partials_dirs]
+            path = next((path for path in paths if os.path.isfile(path)), None)
+            if path is None:
+                raise ValueError(f"Partial {name} not found in {' or '.join(self.partials_dirs)}")
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            # The line break of the include line ends the partial
+            self.partials[name] = self.compiled(text[:-1] if text.endswith("\n") else text)
+        return self.partials[name]
+
+    def compose(self, text):
+        # Template text with all includes (and includes of partials) replaced by the partials
+        return self.expand(self.compiled(text), {}, ())
+
+    def expand(self, structure, parameters, including):
+        parts = []
+        for i, item in enumerate(structure):
+            if i % 2 == 0:
+                parts.append(substitute_parameters(item, parameters))
+                continue
+            prefix, name, include_parameters = item
+            if name in including:
+                raise ValueError(f"Partial {name} includes itself: {' -> '.join(including + (name,))}")
+            include_parameters = {key: substitute_parameters(value, parameters)
+                                  for key, value in include_parameters.items()}
+            parts.append(indent(self.expand(self.partial(name), include_parameters, including + (name,)), prefix))
+        return "".join(parts)
+
+    def outputs(self, folder):
+        return {file_name: (digest, mtime_ns, size) for file_name, digest, mtime_ns, size in
+                self.db.execute("SELECT file_name, digest, mtime_ns, size FROM output WHERE folder = ?", (folder,))}
+
+    def record_outputs(self, folder, outputs):
+        # outputs: file name -> digest of everything the file was rendered from
+        self.db.execute("DELETE FROM output WHERE folder = ?", (folder,))
+        rows = []
+        for file_name, digest in outputs.items():
+            stat = os.stat(os.path.join(folder, file_name))
+            rows.append((folder, file_name, digest, stat.st_mtime_ns, stat.st_size))
+        self.db.executemany("INSERT INTO output (folder, file_name, digest, mtime_ns, size) VALUES (?, ?, ?, ?, ?)",
+                            rows)
+        self.db.commit()
+
+    def update_outputs(self, folder, outputs, removed=()):
+        # Records the files written by a targeted build, the other files of the folder are kept
+        self.db.executemany("DELETE FROM output WHERE folder = ? AND file_name = ?",
+                            [(folder, file_name) for file_name in removed])
+        for file_name, digest in outputs.items():
+            stat = os.stat(os.path.join(folder, file_name))
+            self.db.execute("INSERT OR REPLACE INTO output (folder, file_name, digest, mtime_ns, size) "
+                            "VALUES (?, ?, ?, ?, ?)", (folder, file_name, digest, stat.st_mtime_ns, stat.st_size))
+        self.db.commit()
+
+    def is_current(self, folder, file_name, digest, known):
+        # Written by the last build from the same sources and not changed since
+        if known.get(file_name, (None,))[0] != digest:
+            return False
+        try:
+            stat = os.stat(os.path.join(folder, file_name))
+        except FileNotFoundError:
+            return False
+        return known[file_name][1:] == (stat.st_mtime_ns, stat.st_size)
+
+    def rendered_digests(self):
+        # Digest of the sources of a rendered file -> digest of its content, used by snapshot.py to skip rendering
+        return dict(self.db.execute("SELECT source, digest FROM rendered"))
+
+    def record_rendered(self, rendered, contents):
+        # rendered: source digest -> content digest, contents: content digest -> content (kept compressed for diffs)
+        self.db.executemany("INSERT OR REPLACE INTO rendered (source, digest) VALUES (?, ?)", rendered.items())
+        self.db.executemany("INSERT OR IGNORE INTO blob (digest, content) VALUES (?, ?)",
+                            [(digest, zlib.compress(content.encode("utf-8"))) for digest, content in contents.items()])
+        self.db.commit()
+
+    def content(self, digest):
+        found = self.db.execute("SELECT content FROM blob WHERE digest = ?", (digest,)).fetchone()
+        return zlib.decompress(found[0]).decode("utf-8") if found else None
+
+    def forget_contents(self, keep):
+        # Drops the contents (and the rendered digests pointing to them) not in keep
+        self.db.execute("CREATE TEMP TABLE IF NOT EXISTS keep_digest (digest TEXT PRIMARY KEY)")
+        self.db.execute("DELETE FROM keep_digest")
+        self.db.executemany("INSERT OR IGNORE INTO keep_digest (digest) VALUES (?)", [(digest,) for digest in keep])
+        self.db.execute("DELETE FROM blob WHERE digest NOT IN (SELECT digest FROM keep_digest)")
+        self.db.execute("DELETE FROM rendered WHERE digest NOT IN (SELECT digest FROM keep_digest)")
+        self.db.commit()
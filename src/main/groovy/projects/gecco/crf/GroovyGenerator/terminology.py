@@ -0,0 +1,297 @@
+import argparse
+import csv
+import glob
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import xml.etree.ElementTree as ElementTree
+
+if __package__:
+    from . import code_catalog
+else:
+    import code_catalog
+
+# Local terminology indexes built from the release files (not versioned, the releases are licensed): one file per code
+# system, terminology_SNOMED.idx, terminology_LOINC.idx, ... next to this file. An index is a sorted table read through
+# mmap, opening it costs nothing and a lookup is a binary search over the code offsets, also at full SNOMED CT scale.
+#   header   b"CXXTERM1", number of codes (uint64)
+#   offsets  one uint64 per code, offset of its record, in the byte order of the codes
+#   records  code \t status \t display \t display ... \n   (status is empty for active codes, e.g. INACTIVE otherwise)
+INDEX_FILE_NAME = "terminology_{}.idx"
+MAGIC = b"CXXTERM1"
+HEADER = struct.Struct("<8sQ")
+OFFSET = struct.Struct("<Q")
+
+# Columns of the values sheets holding the display of the code of a code system (see code_catalog.CODE_COLUMNS), checked
+# in the sheets not rendered by a template. Sheets of a template are checked on the columns its codings display.
+DISPLAY_COLUMNS = {
+    "SNOMED": ("SnomedDisplay", "SnomedText"),
+    "LOINC": ("LoincDisplay",),
+    "ATC": ("ATCDisplay",),
+    "ICD": ("ICDDisplay",),
+}
+
+# Code systems of the codings of the templates
+SYSTEM_URLS = {
+    "http://snomed.info/sct": "SNOMED",
+    "http://loinc.org": "LOINC",
+    "http://fhir.de/CodeSystem/dimdi/atc": "ATC",
+    "http://fhir.de/CodeSystem/dimdi/icd-10-gm": "ICD",
+}
+# system = "..." followed by display = "##Column##" in the same coding block
+_coding_display_pattern = re.compile(r'system = "([^"]+)"[^{}]*?display = "##([^#"]+)##"')
+
+SNOMED_FSN = "900000000000003001"
+SNOMED_SYNONYM = "900000000000013009"
+LOINC_DISPLAY_COLUMNS = ("LONG_COMMON_NAME", "SHORTNAME", "DISPLAY_NAME")
+
+
+def index_file(system, folder=code_catalog.src):
+    return os.path.join(folder, INDEX_FILE_NAME.format(system))
+
+
+def normalize(display):
+    return " ".join(display.split()).casefold()
+
+
+def template_display_columns(template):
+    # Code system -> columns of the values sheet substituted into the displays of its codings (commented lines ignored),
+    # e.g. template_LungDiseases: {"SNOMED": ["DiseaseName-EN"]}
+    code = "\n".join(line for line in template.splitlines() if not line.lstrip().startswith("//"))
+    columns = {}
+    for url, column in _coding_display_pattern.findall(code):
+        if url in SYSTEM_URLS and column not in columns.setdefault(SYSTEM_URLS[url], []):
+            columns[SYSTEM_URLS[url]].append(column)
+    return columns
+
+
+def write_index(path, concepts):
+    # concepts: code -> (status, displays)
+    records = sorted((code.encode("utf-8"), "\t".join([code, status] + [" ".join(display.split())
+                                                                        for display in displays]).encode("utf-8"))
+                     for code, (status, displays) in concepts.items())
+    position = HEADER.size + OFFSET.size * len(records)
+    offsets = []
+    for _, record in records:
+        offsets.append(OFFSET.pack(position))
+        position += len(record) + 1
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(records)))
+        f.writelines(offsets)
+        for _, record in records:
+            f.write(record + b"\n")
+    os.replace(tmp_path, path)
+
+
+class TerminologyIndex:
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a terminology index")
+
+    def code_at(self, i):
+        offset = OFFSET.unpack_from(self.data, HEADER.size + OFFSET.size * i)[0]
+        return offset, self.data[offset:self.data.find(b"\t", offset)]
+
+    def lookup(self, code):
+        # (status, displays) of the code, None if the release does not know it
+        key = code.encode("utf-8")
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.code_at(middle)[1] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.count:
+            return None
+        offset, found = self.code_at(low)
+        if found != key:
+            return None
+        _, status, *displays = self.data[offset:self.data.find(b"\n", offset)].decode("utf-8").split("\t")
+        return status, displays
+
+    def close(self):
+        self.data.close()
+
+
+def open_indexes(folder=code_catalog.src):
+    # Indexes available for the code systems checked in the sheets
+    return {system: TerminologyIndex(index_file(system, folder)) for system in DISPLAY_COLUMNS
+            if os.path.isfile(index_file(system, folder))}
+
+
+def read_snomed(release_folder):
+    # RF2 snapshot of the international edition or of a national extension (all sct2_Description files are read)
+    concepts = {}
+    for path in glob.glob(os.path.join(release_folder, "**", "sct2_Concept_*Snapshot*.txt"), recursive=True):
+        with open(path, "r", encoding="utf-8") as f:
+            next(f)
+            for line in f:
+                concept_id, _, active, _ = line.split("\t", 3)
+                concepts[concept_id] = ("" if active == "1" else "INACTIVE", [])
+    for path in glob.glob(os.path.join(release_folder, "**", "sct2_Description_*Snapshot*.txt"), recursive=True):
+        with open(path, "r", encoding="utf-8") as f:
+            next(f)
+            for line in f:
+                _, _, active, _, concept_id, _, type_id, term, _ = line.rstrip("\r\n").split("\t")
+                if active == "1" and type_id in (SNOMED_FSN, SNOMED_SYNONYM) and concept_id in concepts:
+                    # The fully specified name first
+                    if type_id == SNOMED_FSN:
+                        concepts[concept_id][1].insert(0, term)
+                    else:
+                        concepts[concept_id][1].append(term)
+    if not concepts:
+        raise ValueError(f"No sct2_Concept Snapshot file found in {release_folder}")
+    return concepts
+
+
+def read_loinc(loinc_csv):
+    # Loinc.csv of the LOINC release: DEPRECATED and DISCOURAGED codes are reported
+    concepts = {}
+    with open(loinc_csv, "r", encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            status = row.get("STATUS", "")
+            concepts[row["LOINC_NUM"]] = ("" if status in ("", "ACTIVE", "TRIAL") else status,
+                                          [row[column] for column in LOINC_DISPLAY_COLUMNS if row.get(column)])
+    return concepts
+
+
+def read_claml(claml_file):
+    # ClaML release of a classification (ICD-10-GM of the BfArM): preferred labels of the classes
+    concepts = {}
+    for _, element in ElementTree.iterparse(claml_file):
+        if element.tag == "Class":
+            displays = ["".join(rubric.find("Label").itertext()) for rubric in element.findall("Rubric")
+                        if rubric.get("kind") in ("preferred", "preferredLong") and rubric.find("Label") is not None]
+            concepts[element.get("code")] = ("", displays)
+            element.clear()
+    return concepts
+
+
+def is_header(row):
+    # Column names (ATC code;Name) instead of a code: the codes of the supported systems contain a digit, except the
+    # single letter of an ATC anatomical main group
+    code = row[0].strip()
+    return len(code) > 1 and not any(character.isdigit() for character in code)
+
+
+def read_code_list(code_list_file):
+    # Any delimited text file with the code in the first column and the display in the second (e.g. the ATC index)
+    concepts = {}
+    with open(code_list_file, "r", encoding="utf-8-sig", newline="") as f:
+        dialect = csv.Sniffer().sniff(f.read(65536), delimiters=",;\t")
+        f.seek(0)
+        for row_nb, row in enumerate(csv.reader(f, dialect)):
+            if len(row) < 2 or not row[0].strip() or row_nb == 0 and is_header(row):
+                continue
+            concepts.setdefault(row[0].strip(), ("", []))[1].append(row[1].strip())
+    return concepts
+
+
+def read_release(path):
+    if os.path.isdir(path):
+        return read_snomed(path)
+    if os.path.basename(path).lower() == "loinc.csv":
+        return read_loinc(path)
+    if path.lower().endswith(".xml"):
+        return read_claml(path)
+    return read_code_list(path)
+
+
+def build_indexes(releases, folder=code_catalog.src):
+    # releases: code system -> release files (an RF2 folder, Loinc.csv, a ClaML xml or a code list), merged if several
+    for system, paths in releases.items():
+        concepts = {}
+        for path in paths:
+            for code, (status, displays) in read_release(path).items():
+                known_status, known_displays = concepts.get(code, (status, []))
+                concepts[code] = (known_status and status, known_displays + displays)
+        write_index(index_file(system, folder), concepts)
+        print(f"{system}: {len(concepts)} codes indexed from {', '.join(paths)}")
+
+
+def check_catalog(catalog, indexes, display_columns=None):
+    # Problems of the codes and displays of all values sheets: (sheet, row number, IdComplement, message).
+    # display_columns: sheet -> code system -> displayed columns (see template_display_columns), DISPLAY_COLUMNS for the
+    # other sheets
+    display_columns = display_columns or {}
+    problems = []
+    if not indexes:
+        return problems
+    placeholders = ", ".join("?" * len(indexes))
+    sql = f"""SELECT sheet.path, code.row_nb, code.system, code.code, sheet_row.data
+              FROM code
+              JOIN sheet ON sheet.id = code.sheet_id
+              JOIN sheet_row ON sheet_row.sheet_id = code.sheet_id AND sheet_row.row_nb = code.row_nb
+              WHERE code.system IN ({placeholders})
+              ORDER BY sheet.path, code.row_nb, code.system"""
+    for path, row_nb, system, code, data in catalog.execute(sql, list(indexes)):
+        row = json.loads(data)
+        found = indexes[system].lookup(code)
+        if found is None:
+            message = f"{system} code {code} not found"
+        elif found[0]:
+            message = f"{system} code {code} is {found[0].lower()}"
+        else:
+            displays = {normalize(display) for display in found[1]}
+            columns = display_columns[path].get(system, []) if path in display_columns else DISPLAY_COLUMNS[system]
+            wrong = [column for column in columns if row.get(column) and normalize(row[column]) not in displays]
+            if not wrong:
+                continue
+            message = f"{system} display {wrong[0]} '{row[wrong[0]]}' of {code} does not match " \
+                      f"'{found[1][0] if found[1] else ''}'"
+        problems.append((path, row_nb, row.get("IdComplement", ""), message))
+    return problems
+
+
+def print_problems(problems):
+    for path, row_nb, id_complement, message in problems:
+        # Row numbers as shown in excel (header in row 1)
+        print(f"  {path} row {row_nb + 2} ({id_complement}): {message}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the local terminology indexes from release files and check "
+                                                 "the codes and displays of all values sheets against them.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="index the given releases (other indexes are kept)")
+    build_parser.add_argument("--snomed", nargs="+", default=[], help="RF2 release folders")
+    build_parser.add_argument("--loinc", nargs="+", default=[], help="Loinc.csv")
+    build_parser.add_argument("--atc", nargs="+", default=[], help="code lists (code, display), e.g. the ATC index")
+    build_parser.add_argument("--icd", nargs="+", default=[], help="ClaML xml or code list, e.g. ICD-10-GM ClaML")
+    lookup_parser = subparsers.add_parser("lookup", help="status and displays of a code")
+    lookup_parser.add_argument("system", choices=sorted(DISPLAY_COLUMNS))
+    lookup_parser.add_argument("code")
+    subparsers.add_parser("check", help="check all values sheets (exits with 1 on problems)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_indexes({system: paths for system, paths in (("SNOMED", args.snomed), ("LOINC", args.loinc),
+                                                           ("ATC", args.atc), ("ICD", args.icd)) if paths})
+    elif args.command == "lookup":
+        if not os.path.isfile(index_file(args.system)):
+            sys.exit(f"No {args.system} index, build it first")
+        found = TerminologyIndex(index_file(args.system)).lookup(args.code)
+        if found is None:
+            sys.exit(f"{args.code} not found")
+        print(found[0] or "ACTIVE")
+        for display in found[1]:
+            print(f"  {display}")
+    else:
+        import generator
+
+        catalog = code_catalog.open_catalog()
+        code_catalog.build_catalog(catalog, verbose=False)
+        found_indexes = open_indexes()
+        problems = check_catalog(catalog, found_indexes, generator.sheet_display_columns())
+        print_problems(problems)
+        print(f"{len(problems)} problems in the values sheets ({', '.join(sorted(found_indexes)) or 'no indexes'})")
+        sys.exit(1 if problems else 0)
@@ -0,0 +1,107 @@
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+
+# Compiles the SPREC ConceptMaps (*.json in this folder) into a class of each specimen script: one static map constant
+# per ConceptMap, SPREC code -> SNOMED CT code, display and equivalence of the target, e.g.
+# SPRECSampleTypeMap.json -> StaticSprecConceptMaps.SAMPLE_TYPE. The specimen export then needs no translation request
+# per sample. The generated class is replaced between the BEGIN and END lines, or appended to a script without it.
+# Each script gets a class name of its own: the scripts share one package, a second class of the same name would be a
+# duplicate class when src/main/groovy is compiled as a whole.
+concept_maps_dir = os.path.dirname(os.path.abspath(__file__))
+scripts_dir = os.path.dirname(concept_maps_dir)
+SCRIPTS = {"specimen_with_cm_translation.groovy": "CmSprecConceptMaps",
+           "specimen_static_sprec_translation.groovy": "StaticSprecConceptMaps"}
+TARGET_SYSTEM = "http://snomed.info/sct"
+# Targets of these equivalences do not translate the code
+NOT_TRANSLATED = ("unmatched", "disjoint")
+
+BEGIN = "// BEGIN generated by ConceptMaps/compile_concept_maps.py from the SPREC ConceptMaps, do not edit"
+END = "// END generated {}"
+
+
+def constant_name(concept_map_name):
+    # SPRECSampleTypeMap -> SAMPLE_TYPE
+    name = re.sub(r"^SPREC|Map$", "", concept_map_name)
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])", "_", name).upper()
+
+
+def groovy_string(value):
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"').replace("$", "\\$") + '"'
+
+
+def read_concept_map(path):
+    # SPREC code -> first SNOMED CT target translating it
+    with open(path, "r", encoding="utf-8") as f:
+        concept_map = json.load(f)
+    translations = {}
+    for group in concept_map.get("group", []):
+        if group.get("target") != TARGET_SYSTEM:
+            continue
+        for element in group.get("element", []):
+            for target in element.get("target", []):
+                if target.get("code") and target.get("equivalence") not in NOT_TRANSLATED:
+                    translations.setdefault(element["code"], target)
+                    break
+    return concept_map, translations
+
+
+def compile_concept_maps(paths, class_name):
+    lines = [BEGIN, f"class {class_name} {{"]
+    for path in paths:
+        concept_map, translations = read_concept_map(path)
+        entries = [f"      {groovy_string(code)}: [" + ", ".join(
+            f"{groovy_string(key)}: {groovy_string(target[key])}" for key in ("code", "display", "equivalence")
+            if key in target) + "]" for code, target in translations.items()]
+        # the canonical url of a published ConceptMap, otherwise the first sentence of its description (e.g. where the
+        # data comes from)
+        source = concept_map.get("url") or concept_map.get("description", "").split(". ")[0]
+        lines.append(f"  // ConceptMaps/{os.path.basename(path)}: {source}")
+        declaration = f"  static final Map<String, Map<String, String>> {constant_name(concept_map['name'])} = "
+        if entries:
+            lines.extend([declaration + "[", ",\n".join(entries), "  ].asImmutable()"])
+        else:
+            lines.append(declaration + "[:]")
+        lines.append("")
+    lines[-1] = "}"
+    lines.append(END.format(class_name))
+    return "\n".join(lines) + "\n"
+
+
+def update_script(path, generated):
+    with open(path, "r", encoding="utf-8") as f:
+        script = f.read()
+    if BEGIN in script:
+        start = script.index(BEGIN)
+        end = script.index("\n", script.index(END.format(""), start)) + 1
+        updated = script[:start] + generated + script[end:]
+    else:
+        updated = script.rstrip("\n") + "\n\n" + generated
+    if updated != script:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(updated)
+    return updated != script
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the SPREC ConceptMaps into the specimen scripts.")
+    parser.add_argument("--check", action="store_true",
+                        help="only check that the scripts are up to date (exits with 1 otherwise)")
+    args = parser.parse_args()
+
+    concept_map_paths = sorted(glob.glob(os.path.join(concept_maps_dir, "*.json")))
+    outdated = []
+    for script_name, class_name in SCRIPTS.items():
+        generated = compile_concept_maps(concept_map_paths, class_name)
+        script_path = os.path.join(scripts_dir, script_name)
+        if args.check:
+            with open(script_path, "r", encoding="utf-8") as f:
+                if generated not in f.read():
+                    outdated.append(script_name)
+        elif update_script(script_path, generated):
+            print(f"Updated {script_name}")
+    if outdated:
+        sys.exit(f"Not compiled from the current ConceptMaps: {', '.join(outdated)}")
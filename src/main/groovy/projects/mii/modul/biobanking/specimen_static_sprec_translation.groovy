@@ -14,6 +14,7 @@ import static de.kairos.fhir.centraxx.metamodel.RootEntities.sample
  * Represented by a CXX SAMPLE
  * Codings are custumized in CXX. Therefore, the code system is unknown. If other codings are used in the local CXX system, the code systems must be adjusted.
  * In this example SPREC codes for the sample type, and container are translated by a static mapping based on the provide concept maps.
+ * The static maps of StaticSprecConceptMaps at the end of this script are compiled from the concept maps by ConceptMaps/compile_concept_maps.py.
  * TODO: NOTE: The script was written while the corresponding FHIR profile on simplifier.net was still in draft state. Changes in the profile might require adjustments in the script.
  * @author Jonas Küttner
  * @since KAIROS-FHIR-DSL.v.1.8.0, CXX.v.3.18.1
@@ -163,27 +164,6 @@ specimen {
           }
         }
       }
-      /*additiveReference {
-        if (context.source[sample().sprecPrimarySampleContainer()]) {
-          final TranslationResult sprecPrimaryContainerTranslationResult = translateConceptMap(context.source[sample().sprecPrimarySampleContainer().sprecCode()] as String, sprecPrimaryContainerConceptMapUrl)
-          if (sprecPrimaryContainerTranslationResult.code) {
-            additiveCodeableConcept {
-              system = "https://www.medizininformatik-initiative.de/fhir/ext/modul-biobank/ValueSet/additive"
-              code = sprecPrimaryContainerTranslationResult.code
-              display = sprecPrimaryContainerTranslationResult.display
-            }
-          }
-        }*/
-      /*if (context.source[sample().stockType()]) {
-        final TranslationResult sprecFixationTypeTranslationResult = translateConceptMap(context.source[sample().stockType().sprecCode()] as String, sprecFixationTypeConceptMapUrl)
-        if (sprecFixationTypeTranslationResult.code) {
-          additiveCodeableConcept {
-            system = "https://www.medizininformatik-initiative.de/fhir/ext/modul-biobank/ValueSet/additive"
-            code = sprecFixationTypeTranslationResult.code
-            display = sprecFixationTypeTranslationResult.display
-          }
-        }
-      }*/
     }
   }
   note {
@@ -202,97 +182,79 @@ static Specimen.SpecimenStatus mapSpecimenStatus(final String specimenStatus) {
 }
 
 static Map<String, String> mapSampleType(final String sprecCode) {
-  switch (sprecCode) {
-    case "ASC": return ["code"   : "309201001",
-                        "display": "Ascitic fluid sample (specimen)"]
-    case "AMN": return ["code"   : "119373006",
-                        "display": "Amniotic fluid specimen (specimen)"]
-    case "BAL": return ["code"   : "258607008",
-                        "display": "Bronchoalveolar lavage fluid sample (specimen)"]
-    case "BLD": return ["code"   : "420135007",
-                        "display": "Whole blood (substance)"]
-    case "BMA": return ["code"   : "396997002",
-                        "display": "Specimen from bone marrow obtained by aspiration (specimen)"]
-    case "BMK": return ["code"   : "446676001",
-                        "display": "Expressed breast milk specimen (specimen)"]
-    case "BUF": return ["code"   : "258587000",
-                        "display": "Buffy coat (specimen)"]
-    case "BFF": return ["code"   : "258587000",
-                        "display": "Buffy coat (specimen)"]
-    case "CEL": return ["code"   : "404798000",
-                        "display": "Peripheral blood mononuclear cell (cell)"]
-    case "BON": return ["code"   : "430268003",
-                        "display": "Specimen from bone (specimen)"]
-    case "CRD": return ["code"   : "122556008",
-                        "display": "Cord blood specimen (specimen)"]
-    case "HAR": return ["display"    : "Hair specimen (specimen)",
-                        "equivalence": "equivalent"]
-    case "NAL": return ["code"   : "119327009",
-                        "display": "Nail specimen (specimen)"]
-    case "NAS": return ["code"   : "258467004",
-                        "display": "Nasopharyngeal washings (specimen)"]
-    case "PLC": return ["code"   : "119403008",
-                        "display": "Specimen from placenta (specimen)"]
-    case "PFL": return ["code"   : "418564007",
-                        "display": "Pleural fluid specimen (specimen)"]
-    case "RBC": return ["code"   : "119351004",
-                        "display": "Erythrocyte specimen (specimen)"]
-    case "SEM": return ["code"   : "119347001",
-                        "display": "Seminal fluid specimen (specimen)"]
-    case "SPT": return ["code"   : "119334006",
-                        "display": "Sputum specimen (specimen)"]
-    case "SYN": return ["code"   : "119332005",
-                        "display": "Synovial fluid specimen (specimen)"]
-    case "TER": return ["code"   : "122594008",
-                        "display": "Tears specimen (specimen)"]
-    case "TTH": return ["code"   : "430319000",
-                        "display": "Specimen from tooth (specimen)"]
-    case "SER": return ["code"       : "119364003",
-                        "display"    : "Serum specimen (specimen)",
-                        "equivalence": "equivalent"]
-    case "CSF": return ["code"   : "258450006",
-                        "display": "Cerebrospinal fluid sample (specimen)"]
-    case "SAL": return ["code"   : "119342007",
-                        "display": "Saliva specimen (specimen)"]
-    case "STL": return ["code"   : "119339001",
-                        "display": "Stool specimen (specimen)"]
-    case "U24": return ["code"   : "276833005",
-                        "display": "24 hour urine sample (specimen)"]
-    case "URN": return ["code"   : "278020009",
-                        "display": "Spot urine sample (specimen)"]
-    case "URM": return ["code"   : "122575003",
-                        "display": "Urine specimen (specimen)"]
-    case "URT": return ["code"   : "409821005",
-                        "display": " Timed urine specimen (specimen)"]
-    case "DWB": return ["code"   : "119294007",
-                        "display": "Dried blood specimen (specimen)"]
-    case "PL1": return ["code"   : "119361006",
-                        "display": "Plasma specimen (specimen)"]
-    case "PL2": return ["code"   : "119361006",
-                        "display": "Plasma specimen (specimen)"]
-    default: return null
-  }
+  return StaticSprecConceptMaps.SAMPLE_TYPE[sprecCode]
 }
 
-static mapContainer(final String sprecCode, final SampleKind sampleKind)  {
-  switch (sprecCode) {
-    case ["A", "B", "V", "J", "K", "S", "T", "W"]: return ["code"   : "34234003:840560000=256633009",
-                      "display": "Plastic tube , device (physical object): Has compositional material=Polypropylene (substance)"]
-    case ["C", "D", "E", "N"] : return ["code"   : "83059008",
-                                                     "display": "Tube, device (physical object)"]
-    case ["F", "G", "H", "I", "O"] && sampleKind == SampleKind.TISSUE: return ["code": "464601003",
-                                                           "display": "Tissue storage straw (physical object)"]
-    case ["L", "M"]: return [ "code": "434822004",
-                              "display": "Specimen well (physical object)"]
-    case ["Q"] : return ["code": "463490008",
-                         "display": "Medical bag (physical object)"]
-    case ["Z"]: return ["code": "706437002",
-                        "display": "Container (physical object)"]
-    default: null
+static Map<String, String> mapContainer(final String sprecCode, final SampleKind sampleKind) {
+  final Map<String, String> container = StaticSprecConceptMaps.LONG_TERM_STORAGE[sprecCode]
+  // tissue storage straws only apply to tissue samples
+  if (container?.code == "464601003" && sampleKind != SampleKind.TISSUE) {
+    return null
   }
+  return container
 }
 
+// BEGIN generated by ConceptMaps/compile_concept_maps.py from the SPREC ConceptMaps, do not edit
+class StaticSprecConceptMaps {
+  // ConceptMaps/SPRECLongTermStorageMap.json: Legacy data, not the published ConceptMap: transcribed from the former hand-written switch of mapContainer in specimen_static_sprec_translation.groovy and not verified against the SPRECLongTermStorageMap of the MII biobank module, therefore without its canonical url
+  static final Map<String, Map<String, String>> LONG_TERM_STORAGE = [
+      "A": ["code": "34234003:840560000=256633009", "display": "Plastic tube , device (physical object): Has compositional material=Polypropylene (substance)", "equivalence": "equivalent"],
+      "B": ["code": "34234003:840560000=256633009", "display": "Plastic tube , device (physical object): Has compositional material=Polypropylene (substance)", "equivalence": "equivalent"],
+      "V": ["code": "34234003:840560000=256633009", "display": "Plastic tube , device (physical object): Has compositional material=Polypropylene (substance)", "equivalence": "equivalent"],
+      "J": ["code": "34234003:840560000=256633009", "display": "Plastic tube , device (physical object): Has compositional material=Polypropylene (substance)", "equivalence": "equivalent"],
+      "K": ["code": "34234003:840560000=256633009", "display": "Plastic tube , device (physical object): Has compositional material=Polypropylene (substance)", "equivalence": "equivalent"],
+      "S": ["code": "34234003:840560000=256633009", "display": "Plastic tube , device (physical object): Has compositional material=Polypropylene (substance)", "equivalence": "equivalent"],
+      "T": ["code": "34234003:840560000=256633009", "display": "Plastic tube , device (physical object): Has compositional material=Polypropylene (substance)", "equivalence": "equivalent"],
+      "W": ["code": "34234003:840560000=256633009", "display": "Plastic tube , device (physical object): Has compositional material=Polypropylene (substance)", "equivalence": "equivalent"],
+      "C": ["code": "83059008", "display": "Tube, device (physical object)", "equivalence": "equivalent"],
+      "D": ["code": "83059008", "display": "Tube, device (physical object)", "equivalence": "equivalent"],
+      "E": ["code": "83059008", "display": "Tube, device (physical object)", "equivalence": "equivalent"],
+      "N": ["code": "83059008", "display": "Tube, device (physical object)", "equivalence": "equivalent"],
+      "F": ["code": "464601003", "display": "Tissue storage straw (physical object)", "equivalence": "equivalent"],
+      "G": ["code": "464601003", "display": "Tissue storage straw (physical object)", "equivalence": "equivalent"],
+      "H": ["code": "464601003", "display": "Tissue storage straw (physical object)", "equivalence": "equivalent"],
+      "I": ["code": "464601003", "display": "Tissue storage straw (physical object)", "equivalence": "equivalent"],
+      "O": ["code": "464601003", "display": "Tissue storage straw (physical object)", "equivalence": "equivalent"],
+      "L": ["code": "434822004", "display": "Specimen well (physical object)", "equivalence": "equivalent"],
+      "M": ["code": "434822004", "display": "Specimen well (physical object)", "equivalence": "equivalent"],
+      "Q": ["code": "463490008", "display": "Medical bag (physical object)", "equivalence": "equivalent"],
+      "Z": ["code": "706437002", "display": "Container (physical object)", "equivalence": "equivalent"]
+  ].asImmutable()
 
-
-
-
+  // ConceptMaps/SPRECSampleTypeMap.json: Legacy data, not the published ConceptMap: transcribed from the former hand-written switch of mapSampleType in specimen_static_sprec_translation.groovy and not verified against the SPRECSampleTypeMap of the MII biobank module, therefore without its canonical url
+  static final Map<String, Map<String, String>> SAMPLE_TYPE = [
+      "ASC": ["code": "309201001", "display": "Ascitic fluid sample (specimen)", "equivalence": "equivalent"],
+      "AMN": ["code": "119373006", "display": "Amniotic fluid specimen (specimen)", "equivalence": "equivalent"],
+      "BAL": ["code": "258607008", "display": "Bronchoalveolar lavage fluid sample (specimen)", "equivalence": "equivalent"],
+      "BLD": ["code": "420135007", "display": "Whole blood (substance)", "equivalence": "equivalent"],
+      "BMA": ["code": "396997002", "display": "Specimen from bone marrow obtained by aspiration (specimen)", "equivalence": "equivalent"],
+      "BMK": ["code": "446676001", "display": "Expressed breast milk specimen (specimen)", "equivalence": "equivalent"],
+      "BUF": ["code": "258587000", "display": "Buffy coat (specimen)", "equivalence": "equivalent"],
+      "BFF": ["code": "258587000", "display": "Buffy coat (specimen)", "equivalence": "equivalent"],
+      "CEL": ["code": "404798000", "display": "Peripheral blood mononuclear cell (cell)", "equivalence": "equivalent"],
+      "BON": ["code": "430268003", "display": "Specimen from bone (specimen)", "equivalence": "equivalent"],
+      "CRD": ["code": "122556008", "display": "Cord blood specimen (specimen)", "equivalence": "equivalent"],
+      "NAL": ["code": "119327009", "display": "Nail specimen (specimen)", "equivalence": "equivalent"],
+      "NAS": ["code": "258467004", "display": "Nasopharyngeal washings (specimen)", "equivalence": "equivalent"],
+      "PLC": ["code": "119403008", "display": "Specimen from placenta (specimen)", "equivalence": "equivalent"],
+      "PFL": ["code": "418564007", "display": "Pleural fluid specimen (specimen)", "equivalence": "equivalent"],
+      "RBC": ["code": "119351004", "display": "Erythrocyte specimen (specimen)", "equivalence": "equivalent"],
+      "SEM": ["code": "119347001", "display": "Seminal fluid specimen (specimen)", "equivalence": "equivalent"],
+      "SPT": ["code": "119334006", "display": "Sputum specimen (specimen)", "equivalence": "equivalent"],
+      "SYN": ["code": "119332005", "display": "Synovial fluid specimen (specimen)", "equivalence": "equivalent"],
+      "TER": ["code": "122594008", "display": "Tears specimen (specimen)", "equivalence": "equivalent"],
+      "TTH": ["code": "430319000", "display": "Specimen from tooth (specimen)", "equivalence": "equivalent"],
+      "SER": ["code": "119364003", "display": "Serum specimen (specimen)", "equivalence": "equivalent"],
+      "CSF": ["code": "258450006", "display": "Cerebrospinal fluid sample (specimen)", "equivalence": "equivalent"],
+      "SAL": ["code": "119342007", "display": "Saliva specimen (specimen)", "equivalence": "equivalent"],
+      "STL": ["code": "119339001", "display": "Stool specimen (specimen)", "equivalence": "equivalent"],
+      "U24": ["code": "276833005", "display": "24 hour urine sample (specimen)", "equivalence": "equivalent"],
+      "URN": ["code": "278020009", "display": "Spot urine sample (specimen)", "equivalence": "equivalent"],
+      "URM": ["code": "122575003", "display": "Urine specimen (specimen)", "equivalence": "equivalent"],
+      "URT": ["code": "409821005", "display": " Timed urine specimen (specimen)", "equivalence": "equivalent"],
+      "DWB": ["code": "119294007", "display": "Dried blood specimen (specimen)", "equivalence": "equivalent"],
+      "PL1": ["code": "119361006", "display": "Plasma specimen (specimen)", "equivalence": "equivalent"],
+      "PL2": ["code": "119361006", "display": "Plasma specimen (specimen)", "equivalence": "equivalent"]
+  ].asImmutable()
+}
+// END generated StaticSprecConceptMaps
@@ -4,7 +4,6 @@ import de.kairos.fhir.centraxx.metamodel.AbstractIdContainer
 import de.kairos.fhir.centraxx.metamodel.IdContainerType
 import de.kairos.fhir.centraxx.metamodel.MultilingualEntry
 import de.kairos.fhir.centraxx.metamodel.PrecisionDate
-import groovy.json.JsonSlurper
 import org.hl7.fhir.r4.model.Coding
 import org.hl7.fhir.r4.model.Specimen
 
@@ -15,14 +14,15 @@ import static de.kairos.fhir.centraxx.metamodel.RootEntities.sample
  * Represented by a CXX SAMPLE
  * Specified by https://simplifier.net/medizininformatikinitiative-modulbiobank/profilespecimenbioprobe History.v.8 (draft)
  * Codings are customized in CXX. Therefore, the code system is unknown. If other codings are used in the local CXX system, the code systems must be adjusted.
- * In this example SPREC codes for the sample type, and container are translated requesting the the provided concept maps per HTTP.
+ * In this example SPREC codes for the sample type, and container are translated with the provided concept maps, compiled into the
+ * static maps of CmSprecConceptMaps at the end of this script by ConceptMaps/compile_concept_maps.py (no translation request per sample).
+ * This script does not use the published ConceptMaps of simplifier.net: the ConceptMaps in ConceptMaps/ hold the legacy data of the former
+ * static switch of specimen_static_sprec_translation.groovy, until they are replaced by the published versions (see ConceptMaps/README.txt).
  * TODO: NOTE: The script was written while the corresponding FHIR profile on simplifier.net was still in draft state. Changes in the profile might require adjustments in the script.
  * @author Jonas Küttner
  * @since KAIROS-FHIR-DSL.v.1.8.0, CXX.v.3.18.1
  */
 
-final String sampleTypeConceptMapUrl = "https://fhir.simplifier.net/MedizininformatikInitiative-ModulBiobank/ConceptMap/SPRECSampleTypeMap"
-final String longTermStorageConceptMapUrl = "https://fhir.simplifier.net/MedizininformatikInitiative-ModulBiobank/ConceptMap/SPRECLongTermStorageMap"
 specimen {
   id = "Sample/" + context.source[sample().id()]
 
@@ -68,12 +68,12 @@ specimen {
 
   if (context.source[sample().sampleType()]) {
     type {
-      final TranslationResult sampleTypeTranslationResult = translateConceptMap(context.source[sample().sampleType().sprecCode()] as String, sampleTypeConceptMapUrl)
-      if (sampleTypeTranslationResult.code) {
+      final Map<String, String> sampleTypeTranslation = CmSprecConceptMaps.SAMPLE_TYPE[context.source[sample().sampleType().sprecCode()] as String]
+      if (sampleTypeTranslation) {
         coding {
           system = "http://snomed.info/sct"
-          code = sampleTypeTranslationResult.code
-          display = sampleTypeTranslationResult.display
+          code = sampleTypeTranslation.code
+          display = sampleTypeTranslation.display
         }
       }
     }
@@ -122,13 +122,12 @@ specimen {
   if (context.source[sample().receptable()]) {
     container {
       type {
-        final TranslationResult longTermStorageTranslationResult = translateConceptMap(context.source[sample().receptable().sprecCode()] as String,
-            longTermStorageConceptMapUrl)
-        if (longTermStorageTranslationResult.code) {
+        final Map<String, String> longTermStorageTranslation = CmSprecConceptMaps.LONG_TERM_STORAGE[context.source[sample().receptable().sprecCode()] as String]
+        if (longTermStorageTranslation) {
           coding {
             system = "http://snomed.info/sct"
-            code = longTermStorageTranslationResult.code
-            display = longTermStorageTranslationResult.display
+            code = longTermStorageTranslation.code
+            display = longTermStorageTranslation.display
           }
         }
       }
@@ -158,27 +157,6 @@ specimen {
           }
         }
       }
-      /*additiveReference {
-        if (context.source[sample().sprecPrimarySampleContainer()]) {
-          final TranslationResult sprecPrimaryContainerTranslationResult = translateConceptMap(context.source[sample().sprecPrimarySampleContainer().sprecCode()] as String, sprecPrimaryContainerConceptMapUrl)
-          if (sprecPrimaryContainerTranslationResult.code) {
-            additiveCodeableConcept {
-              system = "https://www.medizininformatik-initiative.de/fhir/ext/modul-biobank/ValueSet/additive"
-              code = sprecPrimaryContainerTranslationResult.code
-              display = sprecPrimaryContainerTranslationResult.display
-            }
-          }
-        }*/
-        /*if (context.source[sample().stockType()]) {
-          final TranslationResult sprecFixationTypeTranslationResult = translateConceptMap(context.source[sample().stockType().sprecCode()] as String, sprecFixationTypeConceptMapUrl)
-          if (sprecFixationTypeTranslationResult.code) {
-            additiveCodeableConcept {
-              system = "https://www.medizininformatik-initiative.de/fhir/ext/modul-biobank/ValueSet/additive"
-              code = sprecFixationTypeTranslationResult.code
-              display = sprecFixationTypeTranslationResult.display
-            }
-          }
-        }*/
       }
     }
   note {
@@ -196,51 +174,67 @@ static Specimen.SpecimenStatus mapSpecimenStatus(final String specimenStatus) {
   }
 }
 
-class TranslationResult {
-  String code
-  String display
-  String equivalence
-
-  TranslationResult(code, display, equivalence) {
-    this.code = code
-    this.display = display
-    this.equivalence = equivalence
-  }
+// BEGIN generated by ConceptMaps/compile_concept_maps.py from the SPREC ConceptMaps, do not edit
+class CmSprecConceptMaps {
+  // ConceptMaps/SPRECLongTermStorageMap.json: Legacy data, not the published ConceptMap: transcribed from the former hand-written switch of mapContainer in specimen_static_sprec_translation.groovy and not verified against the SPRECLongTermStorageMap of the MII biobank module, therefore without its canonical url
+  static final Map<String, Map<String, String>> LONG_TERM_STORAGE = [
+      "A": ["code": "34234003:840560000=256633009", "display": "Plastic tube , device (physical object): Has compositional material=Polypropylene (substance)", "equivalence": "equivalent"],
+      "B": ["code": "34234003:840560000=256633009", "display": "Plastic tube , device (physical object): Has compositional material=Polypropylene (substance)", "equivalence": "equivalent"],
+      "V": ["code": "34234003:840560000=256633009", "display": "Plastic tube , device (physical object): Has compositional material=Polypropylene (substance)", "equivalence": "equivalent"],
+      "J": ["code": "34234003:840560000=256633009", "display": "Plastic tube , device (physical object): Has compositional material=Polypropylene (substance)", "equivalence": "equivalent"],
+      "K": ["code": "34234003:840560000=256633009", "display": "Plastic tube , device (physical object): Has compositional material=Polypropylene (substance)", "equivalence": "equivalent"],
+      "S": ["code": "34234003:840560000=256633009", "display": "Plastic tube , device (physical object): Has compositional material=Polypropylene (substance)", "equivalence": "equivalent"],
+      "T": ["code": "34234003:840560000=256633009", "display": "Plastic tube , device (physical object): Has compositional material=Polypropylene (substance)", "equivalence": "equivalent"],
+      "W": ["code": "34234003:840560000=256633009", "display": "Plastic tube , device (physical object): Has compositional material=Polypropylene (substance)", "equivalence": "equivalent"],
+      "C": ["code": "83059008", "display": "Tube, device (physical object)", "equivalence": "equivalent"],
+      "D": ["code": "83059008", "display": "Tube, device (physical object)", "equivalence": "equivalent"],
+      "E": ["code": "83059008", "display": "Tube, device (physical object)", "equivalence": "equivalent"],
+      "N": ["code": "83059008", "display": "Tube, device (physical object)", "equivalence": "equivalent"],
+      "F": ["code": "464601003", "display": "Tissue storage straw (physical object)", "equivalence": "equivalent"],
+      "G": ["code": "464601003", "display": "Tissue storage straw (physical object)", "equivalence": "equivalent"],
+      "H": ["code": "464601003", "display": "Tissue storage straw (physical object)", "equivalence": "equivalent"],
+      "I": ["code": "464601003", "display": "Tissue storage straw (physical object)", "equivalence": "equivalent"],
+      "O": ["code": "464601003", "display": "Tissue storage straw (physical object)", "equivalence": "equivalent"],
+      "L": ["code": "434822004", "display": "Specimen well (physical object)", "equivalence": "equivalent"],
+      "M": ["code": "434822004", "display": "Specimen well (physical object)", "equivalence": "equivalent"],
+      "Q": ["code": "463490008", "display": "Medical bag (physical object)", "equivalence": "equivalent"],
+      "Z": ["code": "706437002", "display": "Container (physical object)", "equivalence": "equivalent"]
+  ].asImmutable()
+
+  // ConceptMaps/SPRECSampleTypeMap.json: Legacy data, not the published ConceptMap: transcribed from the former hand-written switch of mapSampleType in specimen_static_sprec_translation.groovy and not verified against the SPRECSampleTypeMap of the MII biobank module, therefore without its canonical url
+  static final Map<String, Map<String, String>> SAMPLE_TYPE = [
+      "ASC": ["code": "309201001", "display": "Ascitic fluid sample (specimen)", "equivalence": "equivalent"],
+      "AMN": ["code": "119373006", "display": "Amniotic fluid specimen (specimen)", "equivalence": "equivalent"],
+      "BAL": ["code": "258607008", "display": "Bronchoalveolar lavage fluid sample (specimen)", "equivalence": "equivalent"],
+      "BLD": ["code": "420135007", "display": "Whole blood (substance)", "equivalence": "equivalent"],
+      "BMA": ["code": "396997002", "display": "Specimen from bone marrow obtained by aspiration (specimen)", "equivalence": "equivalent"],
+      "BMK": ["code": "446676001", "display": "Expressed breast milk specimen (specimen)", "equivalence": "equivalent"],
+      "BUF": ["code": "258587000", "display": "Buffy coat (specimen)", "equivalence": "equivalent"],
+      "BFF": ["code": "258587000", "display": "Buffy coat (specimen)", "equivalence": "equivalent"],
+      "CEL": ["code": "404798000", "display": "Peripheral blood mononuclear cell (cell)", "equivalence": "equivalent"],
+      "BON": ["code": "430268003", "display": "Specimen from bone (specimen)", "equivalence": "equivalent"],
+      "CRD": ["code": "122556008", "display": "Cord blood specimen (specimen)", "equivalence": "equivalent"],
+      "NAL": ["code": "119327009", "display": "Nail specimen (specimen)", "equivalence": "equivalent"],
+      "NAS": ["code": "258467004", "display": "Nasopharyngeal washings (specimen)", "equivalence": "equivalent"],
+      "PLC": ["code": "119403008", "display": "Specimen from placenta (specimen)", "equivalence": "equivalent"],
+      "PFL": ["code": "418564007", "display": "Pleural fluid specimen (specimen)", "equivalence": "equivalent"],
+      "RBC": ["code": "119351004", "display": "Erythrocyte specimen (specimen)", "equivalence": "equivalent"],
+      "SEM": ["code": "119347001", "display": "Seminal fluid specimen (specimen)", "equivalence": "equivalent"],
+      "SPT": ["code": "119334006", "display": "Sputum specimen (specimen)", "equivalence": "equivalent"],
+      "SYN": ["code": "119332005", "display": "Synovial fluid specimen (specimen)", "equivalence": "equivalent"],
+      "TER": ["code": "122594008", "display": "Tears specimen (specimen)", "equivalence": "equivalent"],
+      "TTH": ["code": "430319000", "display": "Specimen from tooth (specimen)", "equivalence": "equivalent"],
+      "SER": ["code": "119364003", "display": "Serum specimen (specimen)", "equivalence": "equivalent"],
+      "CSF": ["code": "258450006", "display": "Cerebrospinal fluid sample (specimen)", "equivalence": "equivalent"],
+      "SAL": ["code": "119342007", "display": "Saliva specimen (specimen)", "equivalence": "equivalent"],
+      "STL": ["code": "119339001", "display": "Stool specimen (specimen)", "equivalence": "equivalent"],
+      "U24": ["code": "276833005", "display": "24 hour urine sample (specimen)", "equivalence": "equivalent"],
+      "URN": ["code": "278020009", "display": "Spot urine sample (specimen)", "equivalence": "equivalent"],
+      "URM": ["code": "122575003", "display": "Urine specimen (specimen)", "equivalence": "equivalent"],
+      "URT": ["code": "409821005", "display": " Timed urine specimen (specimen)", "equivalence": "equivalent"],
+      "DWB": ["code": "119294007", "display": "Dried blood specimen (specimen)", "equivalence": "equivalent"],
+      "PL1": ["code": "119361006", "display": "Plasma specimen (specimen)", "equivalence": "equivalent"],
+      "PL2": ["code": "119361006", "display": "Plasma specimen (specimen)", "equivalence": "equivalent"]
+  ].asImmutable()
 }
-
-private static TranslationResult translateConceptMap(String code, String queryUrl) {
-  String httpMethod = "GET"
-  URL url = new URL(queryUrl)
-
-  final HttpURLConnection connection = url.openConnection() as HttpURLConnection
-  connection.setRequestMethod(httpMethod)
-  connection.setRequestProperty("Accept", "application/json")
-
-  validateResponse(connection.getResponseCode(), httpMethod, url)
-  final def json = connection.getInputStream().withCloseable { final inStream ->
-    new JsonSlurper().parse(inStream as InputStream)
-  }
-
-  final def snomed_group = json["group"]?.find { final def group ->
-    "http://snomed.info/sct" == group["target"]
-  }
-
-  final def target = snomed_group["element"]?.find { final def element ->
-    code == element["code"]
-  }?.getAt("target") as Map<String, List>
-
-  return new TranslationResult(target["code"][0], target["display"][0], target["equivalence"][0])
-}
-
-/**
- * Validates the HTTP response. If a response is not valid (not 200), an exception is thrown and the transformation ends.
- */
-private static void validateResponse(int httpStatusCode, String httpMethod, URL url) {
-  int expectedStatusCode = 200
-  if (httpStatusCode != expectedStatusCode) {
-    throw new IllegalStateException("'" + httpMethod + "' request on '" + url + "' returned status code: " + httpStatusCode + ". Expected: " + expectedStatusCode)
-  }
-}
-
-
-
+// END generated CmSprecConceptMaps
@@ -0,0 +1,50 @@
+package projects.gecco
+
+import java.util.concurrent.TimeUnit
+
+import static org.junit.jupiter.api.Assertions.assertTrue
+
+/**
+ * Runs the python tools of the GECCO project (GroovyGenerator, ExportTools) from the tests.
+ */
+class PythonProcess {
+
+  final int exitValue
+  final String output
+
+  private PythonProcess(final int exitValue, final String output) {
+    this.exitValue = exitValue
+    this.output = output
+  }
+
+  /**
+   * @return the first python command (python3, python) able to import the given modules, null if none
+   */
+  static String find(final String... modules) {
+    final String imports = (["sys"] + modules.toList()).join(", ")
+    for (final String python : ["python3", "python"]) {
+      try {
+        final Process process = new ProcessBuilder(python, "-c", "import " + imports).redirectErrorStream(true).start()
+        process.inputStream.text
+        if (process.waitFor(1, TimeUnit.MINUTES) && process.exitValue() == 0) {
+          return python
+        }
+      } catch (final IOException ignored) {
+        // not installed
+      }
+    }
+    return null
+  }
+
+  /**
+   * Runs the command from the repository root with the given additional environment variables.
+   */
+  static PythonProcess run(final List<String> command, final Map<String, String> environment = [:]) {
+    final ProcessBuilder builder = new ProcessBuilder(command).redirectErrorStream(true)
+    builder.environment().putAll(environment)
+    final Process process = builder.start()
+    final String output = process.inputStream.text
+    assertTrue(process.waitFor(10, TimeUnit.MINUTES), command.join(" ") + " did not finish")
+    return new PythonProcess(process.exitValue(), output)
+  }
+}
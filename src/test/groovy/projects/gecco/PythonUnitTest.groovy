@@ -0,0 +1,36 @@
+package projects.gecco
+
+import org.junit.jupiter.api.Test
+
+import static org.junit.jupiter.api.Assertions.assertEquals
+import static org.junit.jupiter.api.Assertions.assertFalse
+import static org.junit.jupiter.api.Assumptions.assumeTrue
+
+/**
+ * Test to run the python unit tests of src/test/python (tests of the GroovyGenerator and the ExportTools), one
+ * unittest discovery per folder. Skipped if no python is installed.
+ */
+class PythonUnitTest {
+
+  private static final String PYTHON_TEST_DIR = "src/test/python"
+
+  @Test
+  void testThatPythonUnitTestsPass() {
+
+    final String python = PythonProcess.find()
+    assumeTrue(python != null, "No python found to run the tests of " + PYTHON_TEST_DIR)
+
+    final Set<File> testFolders = new TreeSet<>()
+    new File(PYTHON_TEST_DIR).eachFileRecurse { final File file ->
+      if (file.name ==~ /test_.*\.py/) {
+        testFolders.add(file.parentFile)
+      }
+    }
+    assertFalse(testFolders.isEmpty(), "No python tests found in " + PYTHON_TEST_DIR)
+
+    for (final File testFolder : testFolders) {
+      final PythonProcess process = PythonProcess.run([python, "-B", "-m", "unittest", "discover", "-s", testFolder.path])
+      assertEquals(0, process.exitValue, "Python tests of " + testFolder + " failed:\n" + process.output)
+    }
+  }
+}
@@ -0,0 +1,46 @@
+package projects.gecco.crf
+
+import org.junit.jupiter.api.Test
+import org.junit.jupiter.api.io.TempDir
+import projects.gecco.PythonProcess
+
+import static org.junit.jupiter.api.Assertions.assertEquals
+import static org.junit.jupiter.api.Assertions.assertFalse
+import static org.junit.jupiter.api.Assumptions.assumeTrue
+
+/**
+ * Test to verify that the scripts generated by the GroovyGenerator of each project match its versioned
+ * snapshot_manifest.json (and the committed scripts of versioned projects, e.g. bbmri).
+ * Runs GroovyGenerator/snapshot.py with its caches in a temporary folder, skipped if no python with pandas and
+ * openpyxl is installed.
+ */
+class GroovyGeneratorSnapshotTest {
+
+  private static final String PROJECTS_DIR = "src/main/groovy/projects"
+  private static final String GENERATOR_DIR = PROJECTS_DIR + "/gecco/crf/GroovyGenerator"
+
+  @TempDir
+  File cacheDir
+
+  @Test
+  void testThatGeneratedScriptsMatchSnapshotManifest() {
+
+    final String python = PythonProcess.find("pandas", "openpyxl")
+    assumeTrue(python != null, "No python with pandas and openpyxl found to run " + GENERATOR_DIR + "/snapshot.py")
+
+    final List<File> projects = []
+    new File(PROJECTS_DIR).eachFileRecurse { final File file ->
+      if (file.name == "snapshot_manifest.json" && file.parentFile.name == "GroovyGenerator") {
+        projects.add(file.parentFile.parentFile)
+      }
+    }
+    assertFalse(projects.isEmpty(), "No generated projects found in " + PROJECTS_DIR)
+
+    for (final File project : projects) {
+      final PythonProcess process = PythonProcess.run([python, GENERATOR_DIR + "/snapshot.py", "check", "--project", project.path],
+          [GROOVY_GENERATOR_CACHE_DIR: cacheDir.path])
+      assertEquals(0, process.exitValue, "Generated scripts of " + project + " differ from snapshot_manifest.json " +
+          "(update it with: python " + GENERATOR_DIR + "/snapshot.py update --project " + project + "):\n" + process.output)
+    }
+  }
+}
@@ -0,0 +1,61 @@
+package projects.mii.modul.biobanking
+
+import org.codehaus.groovy.runtime.InvokerHelper
+import org.junit.jupiter.api.Test
+
+import static org.junit.jupiter.api.Assertions.assertEquals
+import static org.junit.jupiter.api.Assertions.assertFalse
+import static org.junit.jupiter.api.Assertions.assertNull
+
+/**
+ * Test to verify the SPREC translations compiled from the ConceptMaps into the specimen scripts.
+ */
+class SprecConceptMapsTest {
+
+  private static final String BIOBANKING_DIR = "src/main/groovy/projects/mii/modul/biobanking/"
+
+  @Test
+  void testThatHairIsNotTranslatedBySampleTypeMap() {
+    final Map<String, String> scripts = ["specimen_with_cm_translation.groovy"     : "CmSprecConceptMaps",
+                                         "specimen_static_sprec_translation.groovy": "StaticSprecConceptMaps"]
+    scripts.each { final String script, final String className ->
+      final Map<String, Map<String, String>> sampleTypes = compiledMap(script, className, "SAMPLE_TYPE")
+
+      // HAR has no SNOMED CT code (unmatched), the scripts export its SPREC coding only
+      assertFalse(sampleTypes.containsKey("HAR"), "HAR translated in " + script)
+      assertEquals("420135007", sampleTypes["BLD"]?.code, "BLD not translated in " + script)
+    }
+  }
+
+  @Test
+  void testThatStaticScriptDoesNotMapHair() {
+    final Class<?> scriptClass = parseScript("specimen_static_sprec_translation.groovy")
+
+    assertNull(InvokerHelper.invokeStaticMethod(scriptClass, "mapSampleType", "HAR"))
+    assertEquals("Whole blood (substance)", (InvokerHelper.invokeStaticMethod(scriptClass, "mapSampleType", "BLD") as Map).display)
+  }
+
+  @Test
+  void testThatScriptsDeclareNoClassTwice() {
+    // the scripts share one package, compiling src/main/groovy as a whole fails on a class declared by two scripts
+    final Map<String, String> declaringScripts = [:]
+    new File(BIOBANKING_DIR).eachFileMatch(~/.*\.groovy/) { final File script ->
+      (script.text =~ /(?m)^class (\w+)/).each { final List<String> match ->
+        final String className = match[1]
+        assertFalse(declaringScripts.containsKey(className),
+            "class " + className + " declared by " + declaringScripts[className] + " and " + script.name)
+        declaringScripts[className] = script.name
+      }
+    }
+  }
+
+  private static Map<String, Map<String, String>> compiledMap(final String script, final String className, final String constant) {
+    final Class<?> conceptMaps = parseScript(script).classLoader.loadClass("projects.mii.modul.biobanking." + className)
+    return conceptMaps."$constant" as Map<String, Map<String, String>>
+  }
+
+  private static Class<?> parseScript(final String script) {
+    // Compiles the script with the classes declared in it, without running the mapping
+    return new GroovyClassLoader().parseClass(new File(BIOBANKING_DIR + script))
+  }
+}
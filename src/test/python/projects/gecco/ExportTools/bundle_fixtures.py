@@ -0,0 +1,25 @@
+import json
+import os
+import sys
+
+EXPORT_TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), *[os.pardir] * 5,
+                                "main", "groovy", "projects", "gecco", "ExportTools")
+sys.path.insert(0, os.path.abspath(EXPORT_TOOLS_DIR))
+
+
+def put(resource_type, res_id, **content):
+    return {"resource": dict({"resourceType": resource_type, "id": res_id}, **content),
+            "request": {"method": "PUT", "url": f"{resource_type}/{res_id}"}}
+
+
+def delete(url):
+    return {"request": {"method": "DELETE", "url": url}}
+
+
+def write_bundle(folder, file_name, entries):
+    # Transaction bundle as exported by CentraXX, file_name may contain sub folders
+    path = os.path.join(folder, file_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"resourceType": "Bundle", "type": "transaction", "entry": entries}, f)
+    return path
@@ -0,0 +1,63 @@
+import tempfile
+import unittest
+
+from bundle_fixtures import delete, put, write_bundle
+import analyze_export
+import bundle_stream
+
+
+class AnalyzeExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_deletes_are_not_counted_as_resources(self):
+        write_bundle(self.folder.name, "bundle_20230101000000.json", [
+            put("Condition", "ChronicLungDisease-Asthma-1"),
+            put("Condition", "ChronicLungDisease-Asthma-2"),
+            delete("Condition/ChronicLungDisease-Asthma-3"),
+            dict(delete("Observation/BodyHeight-4"), resource={"resourceType": "Observation"}),
+        ])
+        report = analyze_export.analyze_export(self.folder.name, workers=1)
+        self.assertEqual(2, report["resources"])
+        self.assertEqual({"Condition": 2}, report["resourcesPerType"])
+        self.assertEqual({"Condition/ChronicLungDisease-Asthma": 2}, report["resourcesPerTemplate"])
+        self.assertEqual(2, report["deletes"])
+        self.assertEqual({"Condition": 1, "Observation": 1}, report["deletesPerType"])
+
+    def test_duplicate_ids_across_files(self):
+        write_bundle(self.folder.name, "a/bundle_20230101000000.json", [put("Patient", "Patient-1"),
+                                                                        put("Patient", "Patient-2")])
+        write_bundle(self.folder.name, "b/bundle_20230102000000.json", [put("Patient", "Patient-1")])
+        report = analyze_export.analyze_export(self.folder.name, workers=1)
+        self.assertEqual(2, report["bundles"])
+        self.assertEqual(3, report["resources"])
+        self.assertEqual(2, report["uniqueResources"])
+        self.assertEqual({"Patient/Patient-1": 2}, report["duplicates"])
+
+    def test_malformed_entries_are_skipped(self):
+        write_bundle(self.folder.name, "bundle_20230101000000.json", [
+            3,
+            {"request": "Patient/Patient-1"},
+            {"request": {"method": "PUT"}},
+            {"resource": {"id": "no-type"}},
+            put("Patient", "Patient-1"),
+        ])
+        report = analyze_export.analyze_export(self.folder.name, workers=1)
+        self.assertEqual(5, report["bundleEntries"]["max"])
+        self.assertEqual({"Patient": 1}, report["resourcesPerType"])
+        self.assertEqual(0, report["deletes"])
+
+    def test_template_key(self):
+        self.assertEqual("Observation/LaborValue-crp", bundle_stream.template_key("Observation/LaborValue-crp-12-345"))
+        self.assertEqual("Observation/HistoryOfTravel", bundle_stream.template_key("Observation/HistoryOfTravel-3-45"))
+        self.assertEqual("Observation/SARSCoV2-IGG-IA", bundle_stream.template_key("Observation/SARSCoV2-IGG-IA-6"))
+        self.assertEqual("Procedure/ECMO", bundle_stream.template_key("Procedure/ECMO78"))
+        self.assertEqual("Patient/42", bundle_stream.template_key("Patient/42"))
+
+
+if __name__ == "__main__":
+    unittest.main()
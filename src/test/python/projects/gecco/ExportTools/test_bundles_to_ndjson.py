@@ -0,0 +1,69 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from bundle_fixtures import delete, put, write_bundle
+import bundle_stream
+import bundles_to_ndjson
+
+
+class BundlesToNdjsonTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.export_folder = os.path.join(self.folder.name, "export")
+        self.output_folder = os.path.join(self.folder.name, "ndjson")
+        self.mapping_config = os.path.join(self.folder.name, "ExportResourceMappingConfig.json")
+        with open(self.mapping_config, "w", encoding="utf-8") as f:
+            json.dump({"mappings": [{"selectFromCxxEntity": "STUDY_VISIT_ITEM", "transformByTemplate": "observation",
+                                     "exportToFhirResource": "Observation"}]}, f)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def read_ndjson(self, res_type):
+        with open(os.path.join(self.output_folder, f"{res_type}.ndjson"), "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_last_exported_version_in_export_order(self):
+        # The later export is in a folder sorted first by path
+        write_bundle(self.export_folder, "b/bundle_2023-01-01T10-00-00.json", [
+            put("Patient", "Patient-1", gender="male"),
+            put("Observation", "BodyHeight-2", status="preliminary"),
+            put("Observation", "BodyHeight-3"),
+        ])
+        write_bundle(self.export_folder, "a/bundle_2023-01-02T10-00-00.json", [
+            put("Patient", "Patient-1", gender="female"),
+            delete("Observation/BodyHeight-3"),
+            put("Observation", "BodyHeight-2", status="final"),
+            {"request": {"method": "PUT"}},
+            3,
+        ])
+        self.assertEqual(["b/bundle_2023-01-01T10-00-00.json", "a/bundle_2023-01-02T10-00-00.json"],
+                         [os.path.relpath(bundle_file, self.export_folder).replace(os.sep, "/")
+                          for bundle_file in bundle_stream.list_bundle_files(self.export_folder)])
+
+        with redirect_stdout(io.StringIO()):
+            bundles_to_ndjson.convert(self.export_folder, self.output_folder, self.mapping_config, shard_size_mb=1)
+        self.assertEqual([{"resourceType": "Patient", "id": "Patient-1", "gender": "female"}],
+                         self.read_ndjson("Patient"))
+        self.assertEqual([{"resourceType": "Observation", "id": "BodyHeight-2", "status": "final"}],
+                         self.read_ndjson("Observation"))
+        with open(os.path.join(self.output_folder, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.assertEqual([("Patient", 1), ("Observation", 1)],
+                         [(res_input["type"], res_input["count"]) for res_input in manifest["input"]])
+
+    def test_export_time_of_files_without_time_in_name(self):
+        older = write_bundle(self.export_folder, "b/older.json", [])
+        newer = write_bundle(self.export_folder, "a/newer.json", [])
+        os.utime(older, (1000000000, 1000000000))
+        os.utime(newer, (1000000100, 1000000100))
+        self.assertEqual([older, newer], bundle_stream.list_bundle_files(self.export_folder))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+import bundle_fixtures  # puts the ExportTools on sys.path
+import estimate_export_volume
+
+
+class EstimateExportVolumeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.generator_folder = os.path.join(self.folder.name, "GroovyGenerator")
+        os.makedirs(self.generator_folder)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def write_json(self, file_name, content):
+        path = os.path.join(self.folder.name, file_name)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(content, f)
+        return path
+
+    def write_catalog(self):
+        # Code catalog of a generation rendering conditionAsthma from row 0 of a values sheet
+        code_catalog = estimate_export_volume.load_generator_module("code_catalog")
+        catalog = code_catalog.open_catalog(os.path.join(self.generator_folder, code_catalog.CATALOG_FILE_NAME))
+        catalog.execute("INSERT INTO sheet (id, path, mtime, size) VALUES (1, 'Form/values_Asthma.xlsx', 0, 0)")
+        catalog.execute("INSERT INTO sheet_row (sheet_id, row_nb, data) VALUES (1, 0, ?)",
+                        (json.dumps({"IdComplement": "Asthma", "ParameterCodeDisease": "COV_ASTHMA"}),))
+        catalog.execute("INSERT INTO code (sheet_id, row_nb, system, code) "
+                        "VALUES (1, 0, 'ParameterCode', 'COV_ASTHMA')")
+        catalog.execute("INSERT INTO script (sheet_id, row_nb, name) VALUES (1, 0, 'conditionAsthma')")
+        catalog.commit()
+        catalog.close()
+
+    def test_estimate(self):
+        self.write_catalog()
+        mapping_config = self.write_json("ExportResourceMappingConfig.json", {"mappings": [
+            {"selectFromCxxEntity": "PATIENT_MASTER", "transformByTemplate": "patient",
+             "exportToFhirResource": "Patient"},
+            {"selectFromCxxEntity": "STUDY_VISIT_ITEM", "transformByTemplate": "conditionAsthma",
+             "exportToFhirResource": "Condition"},
+        ]})
+        with open(os.path.join(self.folder.name, "conditionAsthma.groovy"), "w", encoding="utf-8") as f:
+            f.write('if (crfName != "SarsCov2_ANAMNESE") {\n  return\n}\n')
+        project_config = self.write_json("ProjectConfig.json", {"pageSize": {"value": 10},
+                                                                 "exportInterval": {"value": "0 0 12 * * *"},
+                                                                 "scheduledExportEnable": {"value": True}})
+        resource_sizes = self.write_json("report.json", {"averageBytesPerResource": {"Patient": 850, "Condition": 350}})
+        stats = os.path.join(self.folder.name, "fill_statistics.csv")
+        with open(stats, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["CrfName", "ParameterCode", "FilledRate", "CrfsPerPatient"])
+            writer.writerow(["SarsCov2_ANAMNESE", "", "", "2"])
+            writer.writerow(["SarsCov2_ANAMNESE", "COV_ASTHMA", "0.25", ""])
+
+        estimation = estimate_export_volume.estimate(mapping_config, self.generator_folder, stats, project_config, 40,
+                                                     resource_sizes)
+        self.assertEqual([("patient", 1.0, None), ("conditionAsthma", 0.5, "SarsCov2_ANAMNESE")],
+                         [(row["template"], row["resourcesPerPatient"], row["crfName"])
+                          for row in estimation["mappings"]])
+        self.assertEqual(1.5, estimation["resourcesPerPatient"])
+        self.assertEqual(60, estimation["resourcesPerExport"])
+        self.assertEqual(6, estimation["bundlesPerExport"])
+        self.assertEqual(40 * (1000 + 0.5 * 500) + 6 * estimate_export_volume.BUNDLE_OVERHEAD_BYTES,
+                         estimation["bytesPerExport"])
+        self.assertEqual(1, estimation["exportsPerDay"])
+
+    def test_missing_catalog(self):
+        with self.assertRaises(SystemExit):
+            estimate_export_volume.load_sheet_codes(self.generator_folder)
+
+    def test_default_generator_folder(self):
+        # Relative to the script, not to the working directory
+        self.assertTrue(os.path.isfile(os.path.join(estimate_export_volume.DEFAULT_GENERATOR_FOLDER, "generator.py")))
+
+    def test_exports_per_day(self):
+        self.assertEqual(24, estimate_export_volume.exports_per_day("0 0 * * * *"))
+        self.assertEqual(2 / 7, estimate_export_volume.exports_per_day("0 30 6,18 * * SUN"))
+
+
+if __name__ == "__main__":
+    unittest.main()
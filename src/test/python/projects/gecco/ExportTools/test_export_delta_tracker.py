@@ -0,0 +1,72 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from bundle_fixtures import delete, put, write_bundle
+import export_delta_tracker
+
+
+class ExportDeltaTrackerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.export_folder = os.path.join(self.folder.name, "export")
+        self.downstream_folder = os.path.join(self.folder.name, "downstream")
+        self.index_file = os.path.join(self.folder.name, "delta_index.sqlite")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def track(self):
+        with redirect_stdout(io.StringIO()):
+            return export_delta_tracker.track_export(self.export_folder, self.downstream_folder, self.index_file)
+
+    def delta(self, file_name):
+        path = os.path.join(self.downstream_folder, file_name)
+        if not os.path.isfile(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return [entry["request"]["method"] + " " + entry["request"]["url"] for entry in json.load(f)["entry"]]
+
+    def test_only_changed_resources_are_forwarded(self):
+        write_bundle(self.export_folder, "bundle_20230101000000.json", [
+            put("Patient", "Patient-1", gender="male", meta={"lastUpdated": "2023-01-01T00:00:00Z"}),
+            put("Observation", "BodyHeight-2", status="preliminary"),
+            3,
+        ])
+        self.assertEqual(1, self.track())
+        self.assertEqual(["PUT Patient/Patient-1", "PUT Observation/BodyHeight-2"],
+                         self.delta("bundle_20230101000000.json"))
+
+        write_bundle(self.export_folder, "bundle_20230102000000.json", [
+            # only the volatile meta changed
+            put("Patient", "Patient-1", gender="male", meta={"lastUpdated": "2023-01-02T00:00:00Z"}),
+            put("Observation", "BodyHeight-2", status="final"),
+            delete("Observation/BodyHeight-3"),
+        ])
+        write_bundle(self.export_folder, "bundle_20230103000000.json", [delete("Patient/Patient-1")])
+        self.assertEqual(2, self.track())
+        self.assertEqual(["PUT Observation/BodyHeight-2"], self.delta("bundle_20230102000000.json"))
+        self.assertEqual(["DELETE Patient/Patient-1"], self.delta("bundle_20230103000000.json"))
+
+        # Processed bundles are not read again, an unchanged export writes no delta
+        self.assertEqual(0, self.track())
+        write_bundle(self.export_folder, "bundle_20230104000000.json", [put("Observation", "BodyHeight-2",
+                                                                            status="final")])
+        self.assertEqual(1, self.track())
+        self.assertIsNone(self.delta("bundle_20230104000000.json"))
+
+    def test_content_digest_ignores_volatile_meta(self):
+        resource = {"resourceType": "Patient", "id": "Patient-1", "meta": {"versionId": "1", "profile": ["p"]}}
+        same = {"meta": {"profile": ["p"], "lastUpdated": "2023-01-02T00:00:00Z", "versionId": "2"},
+                "id": "Patient-1", "resourceType": "Patient"}
+        changed = dict(resource, meta={"profile": ["q"]})
+        self.assertEqual(export_delta_tracker.content_digest(resource), export_delta_tracker.content_digest(same))
+        self.assertNotEqual(export_delta_tracker.content_digest(resource), export_delta_tracker.content_digest(changed))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from bundle_fixtures import delete, put
+import fhir_upload_standin
+import replay_benchmark
+
+
+class FhirUploadStandinTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        config = os.path.join(self.folder.name, "BundleRequestMethodConfig.json")
+        with open(config, "w", encoding="utf-8") as f:
+            json.dump({"resourceTypeToHttpMethod": {"Patient": "POST"}}, f)
+        self.server = fhir_upload_standin.make_server(0, config)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/fhir"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.folder.cleanup()
+
+    def post(self, entries):
+        # HTTP status and body of the answer to a transaction bundle with the given entries
+        bundle = json.dumps({"resourceType": "Bundle", "type": "transaction", "entry": entries}).encode("utf-8")
+        request = urllib.request.Request(self.url, data=bundle, method="POST")
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.load(response)
+        except urllib.error.HTTPError as e:
+            return e.code, json.load(e)
+
+    def test_transaction_response(self):
+        status, body = self.post([put("Observation", "BodyHeight-1"), put("Observation", "BodyHeight-1"),
+                                  put("Patient", "Patient-1"), delete("Observation/BodyHeight-1")])
+        self.assertEqual(200, status)
+        self.assertEqual(["201 Created", "200 OK", "400 Bad Request", "204 No Content"],
+                         [entry["response"]["status"] for entry in body["entry"]])
+        stats = self.server.stats.as_dict()
+        self.assertEqual((1, 4, 1), (stats["requests"], stats["resources"], stats["rejected"]))
+
+    def test_malformed_entries_are_rejected(self):
+        for entries in ([3], [{"resource": {"resourceType": "Patient"}}], [{"request": {"method": "PUT"}}],
+                        [{"request": "Patient/1"}]):
+            status, body = self.post([put("Observation", "BodyHeight-1")] + entries)
+            self.assertEqual(400, status, entries)
+            self.assertEqual("OperationOutcome", body["resourceType"])
+            self.assertIn("Bundle.entry[1]", body["issue"][0]["diagnostics"])
+        self.assertEqual(0, self.server.stats.as_dict()["requests"])
+        self.assertEqual(set(), self.server.known_ids)
+
+    def test_replay_records_failed_bundles(self):
+        entries = [json.dumps(put("Observation", "BodyHeight-1")), "3"]
+        result = replay_benchmark.replay(self.url, entries, 1, 1, {"Content-Type": "application/fhir+json"})
+        self.assertEqual({"200": 1, "400": 1}, result["statusCodes"])
+        self.assertEqual(1, result["failedBundles"])
+        self.assertIsNone(replay_benchmark.recommend([result]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import tempfile
+import unittest
+
+from bundle_fixtures import delete, put, write_bundle
+import legacy_id_deletes
+
+
+class LegacyIdDeletesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_legacy_ids(self):
+        discharge = [{"system": legacy_id_deletes.DISCHARGE_IDENTIFIER_SYSTEM, "value": "Patient/Patient-1"}]
+        write_bundle(self.folder.name, "bundle_20230101000000.json", [
+            put("Observation", "HistoryOfTravel-11"),
+            put("Observation", "HistoryOfTravel-3-11"),
+            put("Immunization", "HistoryOfVaccination-12"),
+            put("Observation", "SarsCov2RT-PCR-13", identifier=discharge),
+            put("Observation", "SarsCov2RT-PCR-14", identifier=discharge),
+            put("Observation", "SarsCov2RT-PCR-15"),
+        ])
+        write_bundle(self.folder.name, "bundle_20230102000000.json", [
+            delete("Immunization/HistoryOfVaccination-12"),
+            # laboratory PCR of the same id exported after the discharge PCR
+            put("Observation", "SarsCov2RT-PCR-14"),
+        ])
+        self.assertEqual(["Observation/HistoryOfTravel-11", "Observation/SarsCov2RT-PCR-13"],
+                         legacy_id_deletes.legacy_ids([self.folder.name]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import sys
+import unittest
+
+GENERATOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), *[os.pardir] * 5,
+                             "main", "groovy", "projects", "gecco", "crf", "GroovyGenerator")
+sys.path.insert(0, os.path.abspath(GENERATOR_DIR))
+import groovy_optimizer
+
+BRANCHES = '''observation {
+  if (context.source[crfItems()]) {
+    code = context.source[patient()]
+  } else {
+    display = context.source[patient()]
+  }
+  if (found && context.source[episode()]) {
+    id = context.source[episode()]
+  }
+  value = context.source[crfItems()]
+}
+'''
+
+UNWRAP = '''observation {
+  final def iter = 0
+  if (iter == 0) {
+    /*
+     * explained
+     */
+//    commented()
+    text = """
+  multi
+"""
+  }
+}
+'''
+
+
+class HoistLookupsTest(unittest.TestCase):
+
+    def test_lookup_running_on_every_path_is_read_once(self):
+        text, stats = groovy_optimizer.optimize(BRANCHES)
+        self.assertIn("  final def sourceCrfItems = context.source[crfItems()]\n  if (sourceCrfItems) {", text)
+        self.assertIn("  value = sourceCrfItems\n", text)
+        self.assertEqual(1, stats["saved"])
+
+    def test_lookups_in_branches_stay_lazy(self):
+        text, _ = groovy_optimizer.optimize(BRANCHES)
+        self.assertEqual(2, text.count("context.source[patient()]"))
+        self.assertEqual(2, text.count("context.source[episode()]"))
+
+
+class UnwrapTest(unittest.TestCase):
+
+    def test_comments_keep_indentation_and_strings_are_kept(self):
+        text, stats = groovy_optimizer.optimize(UNWRAP)
+        self.assertEqual(1, stats["unwrapped"])
+        # The comment at column 0 keeps the body from shifting, the string is never shifted
+        self.assertIn('''    /*
+     * explained
+     */
+//    commented()
+    text = """
+  multi
+"""
+''', text)
+        self.assertNotIn("if (iter == 0)", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import unittest
+
+GENERATOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), *[os.pardir] * 5,
+                             "main", "groovy", "projects", "gecco", "crf", "GroovyGenerator")
+sys.path.insert(0, os.path.abspath(GENERATOR_DIR))
+import generator
+
+TRAVEL = '''observation {
+  // id = "Observation/Commented-" + context.source[studyVisitItem().id()]
+  if (crfItemCountry) {
+    id = "Observation/HistoryOfTravel-" + context.source[studyVisitItem().id()]
+  } else {
+    id = "Observation/NoTravel-${iter}-" + context.source[studyVisitItem().studyMember().patientContainer().idContainer()]?.find {
+      "MPI" == it["idContainerType"]?.getAt("code")}["psn"]
+  }
+}
+'''
+
+
+class ResourceIdPatternsTest(unittest.TestCase):
+
+    def test_every_id_expression_is_a_pattern(self):
+        self.assertEqual({"Observation/HistoryOfTravel-{}", "Observation/NoTravel-{}-{}"},
+                         generator.resource_id_patterns(TRAVEL))
+
+    def test_same_pattern_of_two_mappings_is_reported(self):
+        scripts = {"observationHistoryOfTravel_0": TRAVEL, "observationHistoryOfTravel_1": TRAVEL}
+        with self.assertRaisesRegex(ValueError, "Observation/HistoryOfTravel-{}: observationHistoryOfTravel_0, "
+                                                "observationHistoryOfTravel_1"):
+            generator.check_resource_ids(scripts)
+
+    def test_pattern_shared_by_the_scripts_of_a_leaf(self):
+        scripts = {"observationBodyHeight": 'id = "Observation/" + context.source[laborMapping().laborFinding().id()]',
+                   "observationBodyWeight": 'id = "Observation/" + context.source[laborMapping().laborFinding().id()]'}
+        generator.check_resource_ids(scripts, {"Observation/{}": {"observationBodyHeight", "observationBodyWeight"}})
+        with self.assertRaises(ValueError):
+            generator.check_resource_ids(scripts, {"Observation/{}": {"observationBodyHeight"}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+# Tests of src/main/groovy/projects/gecco/crf/GroovyGenerator, run by PythonUnitTest of the test suite or with
+# python -m unittest discover -s src/test/python/projects/gecco/crf (no pandas needed, the catalog rows are written directly)
+GENERATOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), *[os.pardir] * 5,
+                             "main", "groovy", "projects", "gecco", "crf", "GroovyGenerator")
+sys.path.insert(0, os.path.abspath(GENERATOR_DIR))
+import code_catalog
+import generator
+import terminology
+
+LUNG_SHEET = "Anamnesis/Diseases/values_LungDiseases.xlsx"
+ASTHMA = "195967001"
+
+
+class CheckCatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        index_path = os.path.join(self.folder.name, terminology.INDEX_FILE_NAME.format("SNOMED"))
+        terminology.write_index(index_path, {ASTHMA: ("", ["Asthma (disorder)", "Asthma"])})
+        self.indexes = {"SNOMED": terminology.TerminologyIndex(index_path)}
+        self.catalog = code_catalog.open_catalog(os.path.join(self.folder.name, "code_catalog.sqlite"))
+
+    def tearDown(self):
+        self.indexes["SNOMED"].close()
+        self.catalog.close()
+        self.folder.cleanup()
+
+    def add_row(self, path, data):
+        sheet_id = self.catalog.execute("INSERT INTO sheet (path, mtime, size) VALUES (?, 0, 0)", (path,)).lastrowid
+        self.catalog.execute("INSERT INTO sheet_row (sheet_id, row_nb, data) VALUES (?, 0, ?)",
+                             (sheet_id, json.dumps(data)))
+        self.catalog.execute("INSERT INTO code (sheet_id, row_nb, system, code) VALUES (?, 0, 'SNOMED', ?)",
+                             (sheet_id, data["SnomedCode"]))
+
+    def test_template_display_columns(self):
+        self.assertEqual({"SNOMED": ["DiseaseName-EN"]}, generator.sheet_display_columns()[LUNG_SHEET])
+
+    def test_wrong_disease_name_is_reported(self):
+        self.add_row(LUNG_SHEET, {"IdComplement": "Asthma", "SnomedCode": ASTHMA,
+                                  "DiseaseName-EN": "Asthmatic bronchitis"})
+        problems = terminology.check_catalog(self.catalog, self.indexes, generator.sheet_display_columns())
+        self.assertEqual(1, len(problems))
+        self.assertIn("DiseaseName-EN 'Asthmatic bronchitis'", problems[0][3])
+
+    def test_columns_not_displayed_by_the_template_are_ignored(self):
+        self.add_row(LUNG_SHEET, {"IdComplement": "Asthma", "SnomedCode": ASTHMA, "DiseaseName-EN": "Asthma",
+                                  "SnomedDisplay": "Not displayed"})
+        self.assertEqual([], terminology.check_catalog(self.catalog, self.indexes, generator.sheet_display_columns()))
+
+
+class ReadCodeListTest(unittest.TestCase):
+
+    def read(self, text):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "atc_index.csv")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            return terminology.read_code_list(path)
+
+    def test_header_row_is_skipped(self):
+        concepts = self.read("ATC code;Name\nA;Alimentary tract and metabolism\nJ05AX28;Bulevirtide\n")
+        self.assertEqual({"A": ("", ["Alimentary tract and metabolism"]), "J05AX28": ("", ["Bulevirtide"])}, concepts)
+
+    def test_first_code_is_kept_without_header(self):
+        concepts = self.read("CODE1;Code of a test system\nJ05AX28;Bulevirtide\n")
+        self.assertEqual(["CODE1", "J05AX28"], sorted(concepts))
+
+
+if __name__ == "__main__":
+    unittest.main()